@@ -0,0 +1,191 @@
+"""
+Reports the degree distribution, average separation and an estimate of
+the diameter of the actor graph, using BFS from sampled people.
+
+Usage: python analytics.py [directory] [--samples N] [--workers N]
+                           [--seed N] [--cache]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+
+import degrees
+
+try:
+    import numpy as np
+except ImportError:  # fall back to expanding frontiers in pure Python
+    np = None
+
+
+def degree_histogram(graph):
+    """
+    Returns a Counter mapping each no. of distinct co-stars
+    to the no. of people having it.
+    """
+    histogram = Counter()
+    for person in range(len(graph.person_ids)):
+        costars = {star for _, star in graph.neighbors(person)}
+        costars.discard(person)
+        histogram[len(costars)] += 1
+    return histogram
+
+
+def distances_from(source):
+    """
+    Returns a Counter mapping each degree of separation from source
+    to the no. of people at that distance, found by a level-synchronous
+    BFS over degrees.graph.
+    """
+    graph = degrees.graph
+    if np is not None and not graph.extra_movies:
+        return vector_distances_from(graph, source)
+
+    seen_people = bytearray(len(graph.person_ids))
+    seen_movies = bytearray(len(graph.movie_ids))
+    seen_people[source] = 1
+    frontier = [source]
+    histogram = Counter({0: 1})
+    distance = 0
+
+    while frontier:
+        distance += 1
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_for_person(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_for_movie(movie):
+                    if not seen_people[star]:
+                        seen_people[star] = 1
+                        next_frontier.append(star)
+        if next_frontier:
+            histogram[distance] = len(next_frontier)
+        frontier = next_frontier
+
+    return histogram
+
+
+def vector_distances_from(graph, source):
+    """
+    NumPy version of distances_from, expanding a whole frontier
+    with array operations.
+    """
+    person_offsets = np.frombuffer(graph.person_offsets, dtype=np.intc)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.intc)
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.intc)
+    movie_stars = np.frombuffer(graph.movie_stars, dtype=np.intc)
+
+    seen_people = np.zeros(len(graph.person_ids), dtype=bool)
+    seen_movies = np.zeros(len(graph.movie_ids), dtype=bool)
+    seen_people[source] = True
+    frontier = np.array([source], dtype=np.intc)
+    histogram = Counter({0: 1})
+    distance = 0
+
+    while len(frontier):
+        distance += 1
+
+        # movies of the frontier not expanded yet
+        films = gather(person_offsets, person_movies, frontier)
+        films = np.unique(films[~seen_movies[films]])
+        seen_movies[films] = True
+
+        # their stars not reached yet form the next frontier
+        stars = gather(movie_offsets, movie_stars, films)
+        frontier = np.unique(stars[~seen_people[stars]])
+        seen_people[frontier] = True
+        if len(frontier):
+            histogram[distance] = len(frontier)
+
+    return histogram
+
+
+def gather(offsets, targets, sources):
+    """
+    Returns the concatenation of the CSR rows of all sources.
+    """
+    starts = offsets[sources]
+    lengths = offsets[sources + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return targets[:0]
+
+    # index of every element: its row start plus its position in the row
+    row_starts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return targets[row_starts + np.arange(total)]
+
+
+def summarize(histograms):
+    """
+    Returns the average separation over all reachable pairs and the
+    largest eccentricity found, given per-source distance Counters.
+    """
+    total = Counter()
+    for histogram in histograms:
+        total.update(histogram)
+    pairs = sum(count for distance, count in total.items() if distance)
+    separation = sum(distance * count for distance, count in total.items())
+    eccentricity = max(max(histogram) for histogram in histograms)
+    return (separation / pairs if pairs else 0.0), eccentricity
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--samples", type=int, default=100,
+                        help="no. of people to run BFS from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse a binary snapshot of the data")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True, cache=args.cache)
+    graph = degrees.graph
+    print("Data loaded.")
+
+    start = time.perf_counter()
+    histogram = degree_histogram(graph)
+    people = sum(histogram.values())
+    mean = (sum(d * count for d, count in histogram.items()) / people
+            if people else 0.0)
+    print(f"\nDegree distribution ({people} people, mean {mean:.2f} co-stars):")
+    for degree in sorted(histogram)[:20]:
+        print(f"  {degree:>6}: {histogram[degree]}")
+    if len(histogram) > 20:
+        print(f"  ... up to {max(histogram)} co-stars")
+
+    # sample sources among people having at least one credit
+    rng = random.Random(args.seed)
+    candidates = [person for person in range(people)
+                  if len(graph.movies_for_person(person))]
+    sources = rng.sample(candidates, min(args.samples, len(candidates)))
+
+    # forked workers share the loaded graph copy-on-write; without fork
+    # they would have to load it again, so run in this process instead
+    if (args.workers > 1
+            and "fork" in multiprocessing.get_all_start_methods()):
+        context = multiprocessing.get_context("fork")
+        with context.Pool(args.workers) as pool:
+            histograms = pool.map(distances_from, sources)
+    else:
+        histograms = list(map(distances_from, sources))
+
+    elapsed = time.perf_counter() - start
+    if not sources:
+        print("\nNo sources sampled")
+        return
+    separation, eccentricity = summarize(histograms)
+    print(f"\nSampled {len(sources)} sources in {elapsed:.1f}s")
+    print(f"Average separation: {separation:.3f}")
+    print(f"Estimated diameter: >= {eccentricity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmarks degrees.shortest_path across frontier, graph and search
+backends and prints the timings as JSON.
+
+Usage: python benchmark.py [directory] [--synthetic] [--people N]
+                           [--movies N] [--credits N] [--queries N]
+                           [--seed N] [--backend NAME ...] [--output FILE]
+
+With --synthetic, a random actor/movie graph of the given size is
+written to a temporary directory and loaded like any other dataset.
+The list frontier is quadratic in the frontier size, taking minutes per
+query on large graphs, so dict-list-bfs only runs when asked for with
+--backend.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+from landmarks import Landmarks
+from util import QueueFrontier, DequeQueueFrontier
+
+
+def bfs_with(frontier):
+    """
+    Returns a search running a plain BFS with the given frontier class.
+    """
+    def search(source, target):
+        if degrees.graph is not None:
+            graph = degrees.graph
+            return graph.path_ids(degrees.breadth_first_search(
+                graph.person_index[source], graph.person_index[target],
+                graph.neighbors, frontier
+            ))
+        return degrees.breadth_first_search(
+            source, target, degrees.neighbors_for_person, frontier
+        )
+    return search
+
+
+def bidirectional(source, target):
+    return degrees.shortest_path(source, target, "bidirectional")
+
+
+def alt(source, target):
+    return degrees.shortest_path(source, target, "alt")
+
+
+# Maps backend names to (compact, search function)
+BACKENDS = {
+    "dict-list-bfs": (False, bfs_with(QueueFrontier)),
+    "dict-deque-bfs": (False, bfs_with(DequeQueueFrontier)),
+    "dict-bidirectional": (False, bidirectional),
+    "compact-bfs": (True, bfs_with(DequeQueueFrontier)),
+    "compact-bidirectional": (True, bidirectional),
+    "compact-alt": (True, alt),
+}
+
+# Backends run when none are named
+DEFAULT_BACKENDS = [name for name in BACKENDS if name != "dict-list-bfs"]
+
+
+def write_synthetic(directory, n_people, n_movies, n_credits, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv for a random actor/movie
+    graph having n_credits (person, movie) edges.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(directory, "people.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            writer.writerow([i, f"Person {i}", 1900 + i % 100])
+    with open(os.path.join(directory, "movies.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(n_movies):
+            writer.writerow([i, f"Movie {i}", 1900 + i % 120])
+    with open(os.path.join(directory, "stars.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for _ in range(n_credits):
+            writer.writerow([rng.randrange(n_people), rng.randrange(n_movies)])
+
+
+def reset():
+    """
+    Empties the data loaded into degrees.
+    """
+    degrees.names.clear()
+    degrees.people = {}
+    degrees.movies = {}
+    degrees.offsets.clear()
+    degrees.graph = None
+    degrees.landmarks = None
+    degrees.tree_cache = None
+
+
+def load(directory, compact):
+    """
+    Loads a dataset and returns (seconds, peak traced bytes) taken.
+    """
+    reset()
+    return traced(degrees.load_data, directory, compact=compact)
+
+
+def build_landmarks(n_landmarks=8):
+    """
+    Builds the landmarks of the loaded compact graph and returns
+    (seconds, peak traced bytes) taken.
+    """
+    def build():
+        degrees.landmarks = Landmarks.build(degrees.graph, n_landmarks)
+    return traced(build)
+
+
+def traced(function, *args, **kwargs):
+    """
+    Calls function and returns (seconds, peak traced bytes) taken.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def query_pairs(n, seed=0):
+    """
+    Returns n random (source, target) pairs of distinct people.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [tuple(rng.sample(person_ids, 2)) for _ in range(n)]
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of values lie.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_backend(search, pairs):
+    """
+    Runs every pair through search and returns (results, lengths), where
+    results holds the latency, expansion and memory figures.
+    """
+    latencies = []
+    expanded = []
+    lengths = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        path = search(source, target)
+        latencies.append(time.perf_counter() - start)
+        expanded.append(degrees.stats["expanded"])
+        lengths.append(None if path is None else len(path))
+
+    # a second, traced pass measures the memory the searches allocate
+    tracemalloc.start()
+    peak = 0
+    for source, target in pairs:
+        tracemalloc.reset_peak()
+        search(source, target)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    results = {
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "mean_expanded": statistics.mean(expanded),
+        "peak_query_bytes": peak,
+    }
+    return results, lengths
+
+
+def benchmark(directory, backends, n_queries, seed=0):
+    """
+    Returns a report of every backend answering the same seeded queries
+    on a dataset, checking they agree on the separations found.
+    """
+    report = {"directory": directory, "queries": n_queries, "backends": {}}
+    reference = None
+    pairs = None
+
+    for compact in (False, True):
+        names = [name for name in backends if BACKENDS[name][0] == compact]
+        if not names:
+            continue
+        load_seconds, load_bytes = load(directory, compact)
+        landmark_seconds = landmark_bytes = None
+        if any(name.endswith("-alt") for name in names):
+            landmark_seconds, landmark_bytes = build_landmarks()
+        if pairs is None:
+            pairs = query_pairs(n_queries, seed)
+
+        for name in names:
+            results, lengths = run_backend(BACKENDS[name][1], pairs)
+            results["load_s"] = load_seconds
+            results["load_peak_bytes"] = load_bytes
+            if name.endswith("-alt"):
+                results["landmarks_s"] = landmark_seconds
+                results["landmarks_peak_bytes"] = landmark_bytes
+            if reference is None:
+                reference = lengths
+            results["mismatches"] = sum(
+                a != b for a, b in zip(reference, lengths)
+            )
+            report["backends"][name] = results
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="benchmark a generated graph instead")
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=40000)
+    parser.add_argument("--credits", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=BACKENDS, action="append",
+                        help="backend to time (default: all but "
+                             "dict-list-bfs)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON report to FILE")
+    args = parser.parse_args()
+    backends = args.backend or DEFAULT_BACKENDS
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as directory:
+            write_synthetic(directory, args.people, args.movies,
+                            args.credits, args.seed)
+            report = benchmark(directory, backends, args.queries, args.seed)
+        report["directory"] = "synthetic"
+        report["synthetic"] = {"people": args.people, "movies": args.movies,
+                               "credits": args.credits, "seed": args.seed}
+    else:
+        report = benchmark(args.directory, backends, args.queries, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,258 @@
+import argparse
 import csv
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
 
-# Maps names to a set of corresponding person_ids
+import snapshot
+from graph import CompactGraph, Table
+from landmarks import Landmarks
+from name_index import NameIndex
+from util import Node, DequeQueueFrontier, TreeCache
+
+# Maps names to a tuple of corresponding person_ids, which takes far less
+# memory than a set for the many names held by a single person
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids);
+# a Table of name and birth only when loaded compact
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids);
+# a Table of title and year only when loaded compact
 movies = {}
 
+# CompactGraph of the loaded data, if loaded with compact=True
+graph = None
+
+# NameIndex used to resolve misspelt names in batch mode, if enabled
+name_index = None
+
+# Max. edit distance accepted when resolving names through name_index
+fuzzy_distance = 0
+
+# Landmarks of the compact graph used by the alt search, if loaded
+landmarks = None
+
+# TreeCache of BFS trees by source, if enabled
+tree_cache = None
+
+# Maps each CSV filename to the offset up to which it has been loaded
+offsets = {}
+
+# No. of CSV rows processed at a time while loading
+CHUNK_SIZE = 10000
+
+# Counters from the most recent search
+stats = {"expanded": 0}
 
-def load_data(directory):
+
+def load_data(directory, compact=False, cache=False):
     """
     Load data from CSV files into memory.
+
+    If compact is True, people and movies are Tables holding their
+    attributes in columns and the adjacency is kept in a CompactGraph,
+    all sharing the same dense integer ids.
+
+    If cache is True, the data is loaded compact from a binary snapshot
+    when the CSV files are unchanged, and a snapshot is written otherwise.
     """
+    global graph, people, movies
+
+    if cache:
+        loaded = snapshot.load(directory)
+        if loaded is not None:
+            graph, saved_names, people, movies = loaded
+            names.update(saved_names)
+            for filename, _, size in snapshot.csv_key(directory):
+                offsets[filename] = size
+            return
+        load_data(directory, compact=True)
+        snapshot.save(directory, graph, names, people, movies)
+        return
+
+    if compact:
+        people = Table([], {}, ["name", "birth"])
+        movies = Table([], {}, ["title", "year"])
 
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    for chunk in read_chunks(directory, "people.csv", ["id", "name", "birth"]):
+        for person_id, name, birth in chunk:
+            add_person(person_id, name, birth, compact)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    for chunk in read_chunks(directory, "movies.csv", ["id", "title", "year"]):
+        for movie_id, title, year in chunk:
+            add_movie(movie_id, title, year, compact)
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+    chunks = read_chunks(directory, "stars.csv", ["person_id", "movie_id"])
+    if compact:
+        person_index = people.index
+        movie_index = movies.index
+        credits = (
+            (person_index[person_id], movie_index[movie_id])
+            for chunk in chunks
+            for person_id, movie_id in chunk
+            if person_id in person_index and movie_id in movie_index
+        )
+        graph = CompactGraph.from_credits(people.ids, movies.ids, credits,
+                                          person_index, movie_index)
+        return
+    for chunk in chunks:
+        for person_id, movie_id in chunk:
+            add_star(person_id, movie_id)
+
+
+def update_data(directory):
+    """
+    Applies rows appended to the CSV files since they were loaded,
+    without reloading the rest. Returns the no. of rows applied.
+    """
+    global landmarks
+    compact = graph is not None
+    count = 0
+
+    for chunk in read_chunks(directory, "people.csv", ["id", "name", "birth"],
+                             offsets["people.csv"]):
+        for person_id, name, birth in chunk:
+            add_person(person_id, name, birth, compact)
+        count += len(chunk)
+
+    for chunk in read_chunks(directory, "movies.csv", ["id", "title", "year"],
+                             offsets["movies.csv"]):
+        for movie_id, title, year in chunk:
+            add_movie(movie_id, title, year, compact)
+        count += len(chunk)
+
+    for chunk in read_chunks(directory, "stars.csv", ["person_id", "movie_id"],
+                             offsets["stars.csv"]):
+        for person_id, movie_id in chunk:
+            add_star(person_id, movie_id)
+        count += len(chunk)
+
+    # cached trees may no longer be shortest paths, and new credits can
+    # shorten distances so the landmark bounds no longer hold
+    if count and tree_cache is not None:
+        tree_cache.clear()
+    if count and landmarks is not None:
+        landmarks = Landmarks.load_or_build(directory, graph,
+                                            len(landmarks.people))
+    return count
+
+
+def read_chunks(directory, filename, columns, start=None):
+    """
+    Yields lists of at most CHUNK_SIZE rows from a CSV file, each row a
+    tuple of the given columns with its strings interned.
+
+    Reading starts after the header, or at offset start if given, and
+    the offset reached is recorded in offsets once the file is read.
+    """
+    with open(f"{directory}/{filename}", encoding="utf-8", newline="") as f:
+        header = next(csv.reader([f.readline()]))
+        indices = [header.index(column) for column in columns]
+        if start is not None:
+            f.seek(start)
+
+        reader = csv.reader(iter(f.readline, ""))
+        while True:
+            chunk = [
+                tuple(sys.intern(row[i]) for i in indices)
+                for row in itertools.islice(reader, CHUNK_SIZE)
+            ]
+            if not chunk:
+                break
+            yield chunk
+
+        offsets[filename] = f.tell()
+
+
+def add_person(person_id, name, birth, compact):
+    """
+    Adds a row of people.csv to the loaded data. A row for a person
+    already loaded updates their name and birth but keeps their movies
+    and, in the compact graph, their index.
+    """
+    if person_id in people:
+        old_name = people[person_id]["name"].lower()
+        person_ids = tuple(id for id in names[old_name] if id != person_id)
+        if person_ids:
+            names[old_name] = person_ids
+        else:
+            del names[old_name]
+
+    if compact:
+        # the table shares its ids with the graph, so this adds a new
+        # person to the graph as well
+        people.put(person_id, name=name, birth=birth)
+    elif person_id in people:
+        people[person_id].update(name=name, birth=birth)
+    else:
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+    person_ids = names.get(name.lower(), ())
+    if person_id not in person_ids:
+        names[name.lower()] = person_ids + (person_id,)
+
+
+def add_movie(movie_id, title, year, compact):
+    """
+    Adds a row of movies.csv to the loaded data. A row for a movie
+    already loaded updates its title and year but keeps its stars.
+    """
+    if compact:
+        movies.put(movie_id, title=title, year=year)
+    elif movie_id in movies:
+        movies[movie_id].update(title=title, year=year)
+    else:
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+
+
+def add_star(person_id, movie_id):
+    """
+    Adds a row of stars.csv to the loaded data, ignoring
+    unknown people and movies.
+    """
+    try:
+        if graph is not None:
+            graph.add_credit(graph.person_index[person_id],
+                             graph.movie_index[movie_id])
+        else:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+    except KeyError:
+        pass
+
+
+def peak_memory():
+    """
+    Returns the peak resident set size of the process in MB,
+    or None where the platform does not report it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # reported in bytes on macOS and in kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
 
 
 def main():
@@ -58,19 +260,79 @@ def main():
     The main function
     """
 
-    # check no. of arguments provided
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--search", choices=["bfs", "bidirectional", "alt"],
+                        default="bfs",
+                        help="bfs from the source, bfs from both ends, or "
+                             "A* with landmarks (implies --compact)")
+    parser.add_argument("--landmarks", type=int, default=8, metavar="N",
+                        help="no. of landmarks for the alt search")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph as integer CSR arrays")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse a binary snapshot of the data (implies "
+                             "--compact)")
+    parser.add_argument("--tree-cache", type=int, default=0, metavar="N",
+                        help="keep BFS trees of the last N sources")
+    parser.add_argument("--tree-cache-nodes", type=int, default=5000000,
+                        metavar="N",
+                        help="max. total nodes held by cached BFS trees")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer source,target name pairs from FILE "
+                             "('-' for stdin) instead of prompting")
+    parser.add_argument("--fuzzy", type=int, default=0, metavar="N",
+                        help="in batch mode, resolve unknown names to the "
+                             "closest name within N edits")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write batch results to FILE (default stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv",
+                        help="batch output format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="batch worker processes")
+    args = parser.parse_args()
+
+    global tree_cache
+    if args.tree_cache:
+        tree_cache = TreeCache(args.tree_cache, args.tree_cache_nodes)
+
+    # keep stdout clean for batch results
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    compact = args.compact or args.search == "alt"
+    load_data(args.directory, compact=compact, cache=args.cache)
+    peak = peak_memory()
+    if peak is None:
+        print("Data loaded.", file=log)
+    else:
+        print(f"Data loaded (peak RSS {peak:.1f} MB).", file=log)
+
+    global landmarks
+    if args.search == "alt":
+        print("Loading landmarks...", file=log)
+        landmarks = Landmarks.load_or_build(args.directory, graph,
+                                            args.landmarks)
+
+    global name_index, fuzzy_distance
+    if args.batch and args.fuzzy:
+        name_index = NameIndex(people)
+        fuzzy_distance = args.fuzzy
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.format, args.workers,
+                  args.search)
+        return
 
     # run untill user exits
     while True:
 
+        # pick up any rows appended to the data files since the last query
+        applied = update_data(args.directory)
+        if applied:
+            print(f"Applied {applied} new rows.")
+
         # if source or target is not found inform the user and restart
         source = person_id_for_name(input("Name Source: "))
         if source is None:
@@ -87,7 +349,12 @@ def main():
             continue
 
         # finding shortest path
-        path = shortest_path(source, target)
+        path = shortest_path(source, target, args.search)
+        print(f"{stats['expanded']} nodes visited")
+        if tree_cache is not None:
+            print(f"Tree cache: {tree_cache.hits} hits, "
+                  f"{tree_cache.misses} misses, "
+                  f"{tree_cache.evictions} evictions")
 
         # if path exists then print path
         if path is None:
@@ -109,34 +376,155 @@ def main():
             break
 
 
-def shortest_path(source, target):
+def run_batch(input_path, output_path, output_format, workers,
+              method="bfs"):
+    """
+    Answers every source,target pair in the input file, writing one
+    result per pair in the given format and reporting throughput.
+
+    Queries are spread over a pool of forked worker processes, which
+    share the loaded data copy-on-write. Where fork is unavailable, as
+    on Windows, they are answered in this process instead.
+    """
+    infile = (sys.stdin if input_path == "-"
+              else open(input_path, encoding="utf-8"))
+    outfile = (sys.stdout if output_path is None
+               else open(output_path, "w", encoding="utf-8", newline=""))
+
+    with infile:
+        pairs = [(row[0], row[1], method)
+                 for row in csv.reader(infile) if len(row) >= 2]
+
+    fields = ["source", "target", "status", "degrees", "path"]
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(outfile, fieldnames=fields)
+        writer.writeheader()
+
+    start = time.perf_counter()
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(workers)
+        results = pool.imap(batch_query, pairs, chunksize=64)
+    else:
+        pool = None
+        results = map(batch_query, pairs)
+
+    for result in results:
+        if writer is not None:
+            result["path"] = ";".join(
+                f"{movie_id}:{person_id}"
+                for movie_id, person_id in result["path"]
+            )
+            writer.writerow(result)
+        else:
+            outfile.write(json.dumps(result) + "\n")
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+    elapsed = time.perf_counter() - start
+
+    if outfile is not sys.stdout:
+        outfile.close()
+    rate = len(pairs) / elapsed if elapsed else 0
+    print(f"{len(pairs)} queries in {elapsed:.2f}s ({rate:.1f} queries/s)",
+          file=sys.stderr)
+
+
+def batch_query(query):
+    """
+    Returns a result dictionary for a (source name, target name,
+    search method) query without any interactive prompts.
+    """
+    source_name, target_name, method = query
+    result = {"source": source_name, "target": target_name,
+              "status": "ok", "degrees": None, "path": []}
+
+    source = person_id_for_name(source_name, interactive=False)
+    target = person_id_for_name(target_name, interactive=False)
+    if source is None or target is None:
+        unknown = [name for name in (source_name, target_name)
+                   if name.lower() not in names
+                   and (name_index is None
+                        or not name_index.search(name, fuzzy_distance))]
+        result["status"] = "not found" if unknown else "ambiguous"
+        return result
+
+    if source == target:
+        path = []
+    else:
+        path = shortest_path(source, target, method)
+    if path is None:
+        result["status"] = "not connected"
+    else:
+        result["degrees"] = len(path)
+        result["path"] = path
+    return result
+
+
+def shortest_path(source, target, method="bfs"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If no possible path, returns None.
+
+    The method is "bfs", "bidirectional" or "alt", the last one needing
+    the compact graph and its landmarks. If the tree cache is enabled,
+    whole BFS trees are kept per source and later targets from a cached
+    source are answered from the tree.
+    """
+    if method == "alt":
+        if graph is None or landmarks is None:
+            raise ValueError("alt search needs the compact graph "
+                             "and its landmarks")
+        search = alt_search
+    elif method == "bidirectional":
+        search = bidirectional_search
+    elif tree_cache is not None:
+        search = cached_search
+    else:
+        search = breadth_first_search
+
+    # search the compact graph on integer indices if it was loaded
+    if graph is not None:
+        path = search(graph.person_index[source], graph.person_index[target],
+                      graph.neighbors)
+        return graph.path_ids(path)
+    return search(source, target, neighbors_for_person)
+
+
+def breadth_first_search(source, target, neighbors,
+                         frontier=DequeQueueFrontier):
+    """
+    Returns the shortest path from source to target, expanding
+    only from the source using the given neighbors function
+    and frontier class.
+
     If no possible path, returns None.
     """
 
     # initializing the frontier and the first node with source
     node = Node(state=source, parent=None, action=None)
-    ds = QueueFrontier()  # frontier
+    ds = frontier()
     ds.add(node)
     visited = set()  # keeps track of visited states
+    stats["expanded"] = 0
 
     while not ds.empty():
         node = ds.remove()
         visited.add(node.state)
+        stats["expanded"] += 1
 
         # check for all neighbors in the popped state
-        for movieId, personId in neighbors_for_person(node.state):
+        for movieId, personId in neighbors(node.state):
             if not ds.contains_state(personId) and personId not in visited:
                 newNode = Node(state=personId, parent=node, action=movieId)
 
                 # if the nodes state is equal to target then we found the solution
                 if newNode.state == target:
-                    solution = solve(newNode, target)
-                    print(f'{len(visited)+1} nodes visited')
-                    return solution
+                    return solve(newNode, target)
 
                 # else add the new node to the frontier to traverse later
                 ds.add(newNode)
@@ -145,6 +533,156 @@ def shortest_path(source, target):
     return None
 
 
+def cached_search(source, target, neighbors):
+    """
+    Returns the shortest path from source to target by walking the
+    cached BFS tree of the source, building the tree if needed.
+
+    If no possible path, returns None.
+    """
+    stats["expanded"] = 0
+    tree = tree_cache.get(source)
+    if tree is None:
+        tree = bfs_tree(source, neighbors)
+        tree_cache.put(source, tree)
+
+    node = tree.get(target)
+    if node is None:
+        return None
+    return solve(node, target)
+
+
+def bfs_tree(source, neighbors):
+    """
+    Returns a dictionary mapping every state reachable from source
+    to its node in the breadth-first search tree.
+    """
+    tree = {source: Node(state=source, parent=None, action=None)}
+    ds = DequeQueueFrontier()
+    ds.add(tree[source])
+
+    while not ds.empty():
+        node = ds.remove()
+        stats["expanded"] += 1
+        for movieId, personId in neighbors(node.state):
+            if personId not in tree:
+                tree[personId] = Node(state=personId, parent=node,
+                                      action=movieId)
+                ds.add(tree[personId])
+
+    return tree
+
+
+def alt_search(source, target, neighbors):
+    """
+    Returns the shortest path from source to target found by A*, using
+    distances to the landmarks as an admissible heuristic.
+
+    If no possible path, returns None.
+    """
+    stats["expanded"] = 0
+    if landmarks.disconnected(source, target):
+        return None
+    estimate = landmarks.heuristic(target)
+
+    # nodes by state and their distance from source
+    start = Node(state=source, parent=None, action=None)
+    nodes = {source: start}
+    cost = {source: 0}
+    expanded = set()
+
+    # entries are (cost + estimate, tie breaker, state)
+    counter = itertools.count()
+    heap = [(estimate(source), next(counter), source)]
+
+    while heap:
+        _, _, state = heapq.heappop(heap)
+        if state in expanded:
+            continue
+        if state == target:
+            return solve(nodes[state], target)
+        expanded.add(state)
+        stats["expanded"] += 1
+
+        for movieId, personId in neighbors(state):
+            new_cost = cost[state] + 1
+            if personId in cost and cost[personId] <= new_cost:
+                continue
+            cost[personId] = new_cost
+            nodes[personId] = Node(state=personId, parent=nodes[state],
+                                   action=movieId)
+            heapq.heappush(heap, (new_cost + estimate(personId),
+                                  next(counter), personId))
+
+    return None
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest path from source to target, growing one
+    breadth-first frontier from each end until they meet.
+
+    If no possible path, returns None.
+    """
+    stats["expanded"] = 0
+    if source == target:
+        return []
+
+    # nodes discovered from each end, keyed by state; the backward tree's
+    # parents point towards the target
+    forward = {source: Node(state=source, parent=None, action=None)}
+    backward = {target: Node(state=target, parent=None, action=None)}
+    forward_level = [forward[source]]
+    backward_level = [backward[target]]
+
+    while forward_level and backward_level:
+
+        # always grow the smaller frontier by one full level
+        if len(forward_level) <= len(backward_level):
+            level, seen, other = forward_level, forward, backward
+        else:
+            level, seen, other = backward_level, backward, forward
+
+        next_level = []
+        for node in level:
+            stats["expanded"] += 1
+            for movieId, personId in neighbors(node.state):
+                if personId in seen:
+                    continue
+                newNode = Node(state=personId, parent=node, action=movieId)
+                seen[personId] = newNode
+
+                # the first meeting point found is on a shortest path since
+                # each side has been fully explored up to its current depth
+                if personId in other:
+                    return join(forward[personId], backward[personId])
+                next_level.append(newNode)
+
+        if seen is forward:
+            forward_level = next_level
+        else:
+            backward_level = next_level
+
+    return None
+
+
+def join(forward_node, backward_node):
+    """
+    Returns the path from source to target through the meeting
+    point shared by a forward node and a backward node.
+    """
+    path = solve(forward_node, forward_node.state)
+
+    # walk the backward tree towards the target, shifting each movie
+    # onto the person reached through it
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.action, node.parent.state))
+        node = node.parent
+
+    return path
+
+
 def solve(node, target):
     """
     Returns the path if solution is found.
@@ -162,14 +700,27 @@ def solve(node, target):
     return path
 
 
-def person_id_for_name(name):
+def person_id_for_name(name, interactive=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    If not interactive, an ambiguous name is not resolved
+    and None is returned, while an unknown name is resolved to the
+    single closest name in name_index, if enabled.
     """
-    person_ids = list(names.get(name.lower(), set()))  # get matching names
+    person_ids = list(names.get(name.lower(), ()))  # get matching names
+    if len(person_ids) == 0 and name_index is not None and not interactive:
+        candidates = name_index.search(name, fuzzy_distance, limit=2)
+        if len(candidates) == 1 or (
+            len(candidates) == 2 and candidates[0][2] < candidates[1][2]
+        ):
+            return candidates[0][0]
+        return None
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and not interactive:
+        return None
     elif len(person_ids) > 1:  # if multiple matches found then let user select
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -193,6 +744,11 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return set(graph.path_ids(
+            graph.neighbors(graph.person_index[person_id])
+        ))
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()  # stores the neighbor nodes
     for movie_id in movie_ids:
@@ -0,0 +1,182 @@
+from array import array
+from collections.abc import Mapping
+
+
+class CompactGraph():
+    """
+    Bipartite person/movie graph with IMDB ids interned to dense
+    integers and both adjacency directions stored in CSR form.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_stars, person_index=None,
+                 movie_index=None):
+        # Maps integer indices to IMDB ids and back; index dictionaries
+        # already built by the caller are reused rather than rebuilt
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {id: i for i, id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {id: i for i, id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+
+        # The movies of person p are the slice of person_movies between
+        # person_offsets[p] and person_offsets[p + 1], and likewise for the
+        # stars of a movie
+        self.person_offsets = memoryview(person_offsets)
+        self.person_movies = memoryview(person_movies)
+        self.movie_offsets = memoryview(movie_offsets)
+        self.movie_stars = memoryview(movie_stars)
+
+        # Credits added after the arrays were built, by index
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    @classmethod
+    def from_credits(cls, person_ids, movie_ids, credits, person_index=None,
+                     movie_index=None):
+        """
+        Builds a graph from lists of person and movie ids and an
+        iterable of (person_index, movie_index) credits, reusing the
+        dictionaries mapping ids to indices if given.
+        """
+        n_people = len(person_ids)
+        people = array("i")
+        films = array("i")
+        for p, m in credits:
+            people.append(p)
+            films.append(m)
+        offsets, grouped = cls.compress(people, films, n_people)
+        del films
+
+        # drop duplicate credits person by person, keeping each person's
+        # movies sorted; people[i] becomes the person of person_movies[i]
+        person_offsets = array("i", [0])
+        person_movies = array("i")
+        del people[:]
+        for p in range(n_people):
+            movies = sorted(set(grouped[offsets[p]:offsets[p + 1]]))
+            person_movies.extend(movies)
+            person_offsets.append(len(person_movies))
+            people.extend([p] * len(movies))
+        del offsets, grouped
+
+        movie_offsets, movie_stars = cls.compress(person_movies, people,
+                                                  len(movie_ids))
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_stars, person_index, movie_index)
+
+    @staticmethod
+    def compress(sources, targets, n):
+        """
+        Returns (offsets, targets) arrays grouping the edge list
+        sources[i] -> targets[i] by source, for n sources.
+        """
+
+        # count the edges of each source, then prefix sum them into offsets
+        offsets = array("i", bytes(4 * (n + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        # place every target in the next free slot of its source
+        grouped = array("i", bytes(4 * len(targets)))
+        position = offsets[:-1]
+        for source, target in zip(sources, targets):
+            grouped[position[source]] = target
+            position[source] += 1
+        return offsets, grouped
+
+    def add_credit(self, person, movie):
+        """
+        Adds a credit on top of the CSR arrays without rebuilding them.
+        """
+        if movie in self.movies_for_person(person):
+            return
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+
+    def movies_for_person(self, person):
+        """
+        Returns a view of the movie indices a person starred in.
+        """
+        offsets = self.person_offsets
+        if person + 1 < len(offsets):
+            movies = self.person_movies[offsets[person]:offsets[person + 1]]
+        else:
+            movies = ()
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else [*movies, *extra]
+
+    def stars_for_movie(self, movie):
+        """
+        Returns a view of the person indices who starred in a movie.
+        """
+        offsets = self.movie_offsets
+        if movie + 1 < len(offsets):
+            stars = self.movie_stars[offsets[movie]:offsets[movie + 1]]
+        else:
+            stars = ()
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else [*stars, *extra]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        for movie in self.movies_for_person(person):
+            for star in self.stars_for_movie(movie):
+                yield movie, star
+
+    def path_ids(self, path):
+        """
+        Converts a path of (movie, person) index pairs to IMDB ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+class Table(Mapping):
+    """
+    Read-only mapping of ids to row dictionaries, such as the people of
+    degrees.py, stored as one list per column instead of a dictionary
+    per row. Row numbers are the dense integers of a CompactGraph.
+    """
+
+    def __init__(self, ids, index, columns):
+        # Same list and dictionary as the graph's person_ids and
+        # person_index (or movie_ids and movie_index), so that rows
+        # added here are known to the graph too
+        self.ids = ids
+        self.index = index
+        self.columns = {field: [] for field in columns}
+
+    def __getitem__(self, id):
+        row = self.index[id]
+        return {field: values[row] for field, values in self.columns.items()}
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def put(self, id, **values):
+        """
+        Sets the fields of a row, adding the id as the next row if new.
+        """
+        row = self.index.get(id)
+        if row is None:
+            row = self.index[id] = len(self.ids)
+            self.ids.append(id)
+            for field, column in self.columns.items():
+                column.append(values[field])
+            return
+        for field, value in values.items():
+            self.columns[field][row] = value
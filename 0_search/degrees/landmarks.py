@@ -0,0 +1,124 @@
+import os
+import pickle
+from array import array
+
+import snapshot
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class Landmarks():
+    """
+    BFS distances from a few landmark people to everyone in a
+    CompactGraph, giving an admissible A* heuristic through the
+    triangle inequality.
+    """
+
+    def __init__(self, people, distances):
+        self.people = people  # person indices of the landmarks
+        self.distances = distances  # one array of distances per landmark
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Picks the count people with the most co-star credits as
+        landmarks and computes their distances.
+        """
+        def reach(person):
+            return sum(len(graph.stars_for_movie(movie))
+                       for movie in graph.movies_for_person(person))
+
+        people = sorted(range(len(graph.person_ids)), key=reach,
+                        reverse=True)[:count]
+        return cls(people,
+                   [distances_from(graph, person) for person in people])
+
+    @classmethod
+    def load_or_build(cls, directory, graph, count):
+        """
+        Returns the landmarks saved for a dataset if its CSV files are
+        unchanged, otherwise builds and saves them.
+        """
+        path = os.path.join(snapshot.snapshot_dir(directory),
+                            "landmarks.pickle")
+        key = (snapshot.csv_key(directory), count)
+        try:
+            with open(path, "rb") as f:
+                saved = pickle.load(f)
+            if saved["key"] == key:
+                return cls(saved["people"],
+                           [array("B", d) for d in saved["distances"]])
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+            pass
+
+        landmarks = cls.build(graph, count)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            pickle.dump({
+                "key": key,
+                "people": landmarks.people,
+                "distances": [d.tobytes() for d in landmarks.distances]
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return landmarks
+
+    def disconnected(self, source, target):
+        """
+        Returns True if some landmark reaches exactly one of source
+        and target, proving there is no path between them.
+        """
+        for distances in self.distances:
+            if max(source, target) >= len(distances):
+                continue
+            if ((distances[source] == UNREACHABLE)
+                    != (distances[target] == UNREACHABLE)):
+                return True
+        return False
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance
+        from a person to target.
+        """
+        bounds = [(d, d[target] if target < len(d) else UNREACHABLE)
+                  for d in self.distances]
+
+        def estimate(person):
+            best = 0
+            for distances, to_target in bounds:
+                if person >= len(distances):
+                    continue  # added after the landmarks were computed
+                from_person = distances[person]
+                if from_person == UNREACHABLE or to_target == UNREACHABLE:
+                    continue
+                best = max(best, abs(to_target - from_person))
+            return best
+        return estimate
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of the degrees of separation from source to
+    every person, UNREACHABLE where there is no path.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier = [source]
+    distance = 0
+
+    while frontier:
+        distance = min(distance + 1, UNREACHABLE - 1)
+        next_frontier = []
+        for person in frontier:
+            for movie in graph.movies_for_person(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for star in graph.stars_for_movie(movie):
+                    if distances[star] == UNREACHABLE:
+                        distances[star] = distance
+                        next_frontier.append(star)
+        frontier = next_frontier
+
+    return distances
@@ -0,0 +1,278 @@
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Sorted-array index over lower-cased person names supporting exact,
+    prefix and bounded edit distance lookups without any prompting.
+    """
+
+    def __init__(self, people, max_distance=2, part_length=7):
+        """
+        Builds the index from a dictionary mapping person_ids
+        to dictionaries with a "name".
+
+        Searches within max_distance edits use deletion neighbourhoods
+        of the first and last part_length characters of each name.
+        """
+        ids = {}
+        for person_id, person in people.items():
+            ids.setdefault(person["name"].lower(), []).append(person_id)
+
+        # keys[i] is a distinct name and ids[i] the people having it
+        self.keys = sorted(ids)
+        self.ids = [ids[key] for key in self.keys]
+
+        self.max_distance = max_distance
+        self.part_length = part_length
+        self.heads = DeletionIndex(
+            [key[:part_length] for key in self.keys], max_distance,
+            part_length
+        )
+        self.tails = DeletionIndex(
+            [key[::-1][:part_length] for key in self.keys], max_distance,
+            part_length
+        )
+
+    def exact(self, name):
+        """
+        Returns the person_ids having exactly the given name.
+        """
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return list(self.ids[i])
+        return []
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit (person_id, name) pairs whose
+        name starts with prefix, in name order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            for person_id in self.ids[i]:
+                if len(matches) == limit:
+                    return matches
+                matches.append((person_id, self.keys[i]))
+            i += 1
+        return matches
+
+    def search(self, query, max_distance=2, limit=10):
+        """
+        Returns up to limit (person_id, name, distance) tuples whose name
+        is within max_distance edits of query, closest first.
+
+        Candidates are the names sharing a deletion variant of both their
+        head and their tail with the query; each is then checked with the
+        banded edit distance. Distances beyond the index's max_distance
+        fall back to walking every key.
+        """
+        query = query.lower()
+        if max_distance > self.max_distance:
+            return self.walk(query, max_distance, limit)
+
+        heads = self.heads.lookup(query[:self.part_length], max_distance)
+        tails = self.tails.lookup(query[::-1][:self.part_length],
+                                  max_distance)
+
+        # scan the keys of the smaller side, keeping those the other has
+        if self.heads.size(heads) <= self.tails.size(tails):
+            candidates = self.heads.keys(heads, self.tails, tails)
+        else:
+            candidates = self.tails.keys(tails, self.heads, heads)
+
+        matches = []
+        for i in candidates:
+            name = self.keys[i]
+            distance = self.distance(query, name, max_distance)
+            if distance is None:
+                continue
+            for person_id in self.ids[i]:
+                matches.append((distance, not name.startswith(query),
+                                name, person_id))
+
+        matches.sort()
+        return [(person_id, name, distance)
+                for distance, _, name, person_id in matches[:limit]]
+
+    def distance(self, query, name, max_distance):
+        """
+        Returns the edit distance between query and name, or None if it
+        is above max_distance.
+        """
+        if abs(len(query) - len(name)) > max_distance:
+            return None
+
+        # a common prefix or suffix never needs editing
+        start = 0
+        shortest = min(len(query), len(name))
+        while start < shortest and query[start] == name[start]:
+            start += 1
+        end = 0
+        while (end < shortest - start
+               and query[-1 - end] == name[-1 - end]):
+            end += 1
+        query = query[start:len(query) - end]
+        name = name[start:len(name) - end]
+
+        row = list(range(len(query) + 1))
+        for depth, char in enumerate(name, 1):
+            row = self.next_row(row, query, char, depth, max_distance)
+            if min(row) > max_distance:
+                return None
+        return row[-1] if row[-1] <= max_distance else None
+
+    def walk(self, query, max_distance, limit):
+        """
+        Returns search results for a lower-cased query by walking every
+        key in order.
+
+        The sorted keys are walked like a trie: the edit distance rows of a
+        shared prefix are reused, and every name below a prefix whose row
+        already exceeds max_distance is skipped with a binary search.
+        """
+        keys = self.keys
+        rows = [list(range(len(query) + 1))]  # rows[d] after d characters
+        current = ""  # the prefix rows describes
+        matches = []
+
+        i = 0
+        while i < len(keys):
+            name = keys[i]
+
+            # keep the rows of the prefix shared with the previous name
+            common = 0
+            limit_common = min(len(current), len(name))
+            while common < limit_common and current[common] == name[common]:
+                common += 1
+            del rows[common + 1:]
+
+            pruned = False
+            for depth in range(common, len(name)):
+                row = self.next_row(rows[-1], query, name[depth],
+                                    depth + 1, max_distance)
+                rows.append(row)
+                if min(row) > max_distance:
+
+                    # no name with this prefix can be close enough
+                    pruned = True
+                    stop = name[:depth] + chr(ord(name[depth]) + 1)
+                    i = bisect_left(keys, stop, i + 1)
+                    break
+
+            current = name[:len(rows) - 1]
+            if pruned:
+                continue
+            distance = rows[-1][-1]
+            if distance <= max_distance:
+                for person_id in self.ids[i]:
+                    matches.append((distance, not name.startswith(query),
+                                    name, person_id))
+            i += 1
+
+        matches.sort()
+        return [(person_id, name, distance)
+                for distance, _, name, person_id in matches[:limit]]
+
+    @staticmethod
+    def next_row(previous, query, char, depth, max_distance):
+        """
+        Returns the edit distance row after appending char to the
+        prefix whose row is previous, giving a prefix of length depth.
+
+        Only the band of cells within max_distance of the diagonal is
+        computed; cells outside it are capped at max_distance + 1.
+        """
+        cap = max_distance + 1
+        row = [cap] * len(previous)
+        row[0] = min(depth, cap)
+        for j in range(max(1, depth - max_distance),
+                       min(len(query), depth + max_distance) + 1):
+            row[j] = min(
+                row[j - 1] + 1,
+                previous[j] + 1,
+                previous[j - 1] + (query[j - 1] != char),
+                cap
+            )
+        return row
+
+
+class DeletionIndex():
+    """
+    Maps the strings obtained by deleting up to max_distance characters
+    from parts of names (and truncating) to the names having those parts.
+
+    If two names are within d <= max_distance edits, the characters left
+    unedited form a common subsequence of both, reached by deleting at
+    most d characters from each. Its first part_length - max_distance
+    characters lie within the first part_length characters of both
+    names, so their parts share a variant.
+    """
+
+    def __init__(self, parts, max_distance, part_length):
+        """
+        Builds the index of parts[i], the part of key i. Keys sharing a
+        part share a group, whose variants are computed once.
+        """
+        self.length = part_length - max_distance
+
+        # members[g] are the keys in group g, group_of[i] the group of key i
+        groups = {}
+        self.members = []
+        self.group_of = []
+        for i, part in enumerate(parts):
+            group = groups.get(part)
+            if group is None:
+                group = groups[part] = len(self.members)
+                self.members.append([])
+            self.members[group].append(i)
+            self.group_of.append(group)
+
+        self.sizes = [len(members) for members in self.members]
+
+        self.variants = {}
+        for part, group in groups.items():
+            for variant in self.deletions(part, max_distance):
+                self.variants.setdefault(variant, []).append(group)
+
+    def deletions(self, part, max_distance):
+        """
+        Returns the set of strings made by deleting up to max_distance
+        characters from part, truncated to the index's variant length.
+        """
+        found = {part}
+        frontier = {part}
+        for _ in range(max_distance):
+            frontier = {variant[:i] + variant[i + 1:]
+                        for variant in frontier for i in range(len(variant))}
+            found |= frontier
+        return {variant[:self.length] for variant in found}
+
+    def lookup(self, part, max_distance):
+        """
+        Returns the set of groups sharing a variant with part, among them
+        every group of a key within max_distance edits of the query.
+        """
+        groups = set()
+        for variant in self.deletions(part, max_distance):
+            groups.update(self.variants.get(variant, ()))
+        return groups
+
+    def keys(self, groups, other, other_groups):
+        """
+        Returns the keys in groups whose group in the other index is
+        among other_groups.
+        """
+        members = self.members
+        group_of = other.group_of
+        return [i for group in groups for i in members[group]
+                if group_of[i] in other_groups]
+
+    def size(self, groups):
+        """
+        Returns the no. of keys in groups.
+        """
+        return sum(map(self.sizes.__getitem__, groups))
@@ -0,0 +1,99 @@
+import mmap
+import os
+import pickle
+from array import array
+
+from graph import CompactGraph
+
+CSV_FILES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Bumped whenever the layout of the snapshot changes
+FORMAT = 2
+
+# Order in which the graph arrays are laid out in the binary file
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars"]
+
+
+def snapshot_dir(directory):
+    """
+    Returns the directory holding the snapshot of a dataset.
+    """
+    return os.path.join(directory, ".snapshot")
+
+
+def csv_key(directory):
+    """
+    Returns the (name, mtime, size) of each CSV file, used to tell
+    whether a snapshot is still up to date.
+    """
+    key = []
+    for name in CSV_FILES:
+        stat = os.stat(os.path.join(directory, name))
+        key.append((name, stat.st_mtime_ns, stat.st_size))
+    return key
+
+
+def save(directory, graph, names, people, movies):
+    """
+    Writes a snapshot of the loaded data: the graph arrays as raw
+    binary and everything else as a pickle.
+    """
+    path = snapshot_dir(directory)
+    os.makedirs(path, exist_ok=True)
+
+    lengths = []
+    with open(os.path.join(path, "graph.bin"), "wb") as f:
+        for name in ARRAYS:
+            values = getattr(graph, name)
+            lengths.append(len(values))
+            f.write(values)
+
+    meta = {
+        "format": FORMAT,
+        "key": csv_key(directory),
+        "lengths": lengths,
+        "person_ids": graph.person_ids,
+        "movie_ids": graph.movie_ids,
+        "names": names,
+        "people": people,
+        "movies": movies,
+    }
+    with open(os.path.join(path, "meta.pickle"), "wb") as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(directory):
+    """
+    Returns (graph, names, people, movies) from the snapshot of a
+    dataset, with the graph arrays memory-mapped.
+
+    Returns None if there is no snapshot or the CSV files changed.
+    """
+    path = snapshot_dir(directory)
+    try:
+        with open(os.path.join(path, "meta.pickle"), "rb") as f:
+            meta = pickle.load(f)
+        if (meta.get("format") != FORMAT
+                or meta["key"] != csv_key(directory)):
+            return None
+        with open(os.path.join(path, "graph.bin"), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError):
+        return None
+
+    # slice the mapped file back into the individual arrays
+    buffer = memoryview(mapped)
+    views = []
+    start = 0
+    itemsize = array("i").itemsize
+    for length in meta["lengths"]:
+        end = start + length * itemsize
+        views.append(buffer[start:end].cast("i"))
+        start = end
+
+    # the tables were pickled together with the graph's id lists, so
+    # they still share them; the graph reuses their indices too
+    people, movies = meta["people"], meta["movies"]
+    graph = CompactGraph(meta["person_ids"], meta["movie_ids"], *views,
+                         people.index, movies.index)
+    return graph, meta["names"], people, movies
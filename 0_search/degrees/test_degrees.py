@@ -0,0 +1,64 @@
+import itertools
+import os
+import random
+import tempfile
+import unittest
+
+import benchmark
+import degrees
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+class BidirectionalTest(unittest.TestCase):
+    """
+    Checks the bidirectional search finds paths as short as the BFS.
+    """
+
+    def tearDown(self):
+        benchmark.reset()
+
+    def assertValidPath(self, source, target, path):
+        """
+        Asserts each step of path is a movie shared by the person before
+        it and the person it reaches, ending at target.
+        """
+        person = source
+        for movie_id, person_id in path:
+            self.assertIn(movie_id, degrees.people[person]["movies"])
+            self.assertIn(person_id, degrees.movies[movie_id]["stars"])
+            person = person_id
+        self.assertEqual(person, target)
+
+    def assertSameLengths(self, pairs):
+        for source, target in pairs:
+            bfs = degrees.shortest_path(source, target, "bfs")
+            bidirectional = degrees.shortest_path(source, target,
+                                                  "bidirectional")
+            if bfs is None:
+                self.assertIsNone(bidirectional)
+                continue
+            self.assertIsNotNone(bidirectional)
+            self.assertEqual(len(bfs), len(bidirectional))
+            self.assertValidPath(source, target, bfs)
+            self.assertValidPath(source, target, bidirectional)
+
+    def test_small(self):
+        benchmark.reset()
+        degrees.load_data(SMALL)
+        self.assertSameLengths(itertools.permutations(degrees.people, 2))
+
+    def test_synthetic(self):
+        benchmark.reset()
+        with tempfile.TemporaryDirectory() as directory:
+            benchmark.write_synthetic(directory, 300, 200, 700, seed=1)
+            degrees.load_data(directory)
+        rng = random.Random(1)
+        person_ids = sorted(degrees.people)
+        self.assertSameLengths(
+            [tuple(rng.sample(person_ids, 2)) for _ in range(2000)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
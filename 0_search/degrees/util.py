@@ -1,3 +1,6 @@
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -43,3 +46,93 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    For DFS Traversal, with constant time add, remove and contains_state
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}  # maps each state to the no. of its nodes in the frontier
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.pop()
+            count = self.states[node.state] - 1
+            if count:
+                self.states[node.state] = count
+            else:
+                del self.states[node.state]
+            return node
+
+    def pop(self):
+        return self.frontier.pop()
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+    """
+    For BFS Traversal, with constant time add, remove and contains_state
+    """
+
+    def pop(self):
+        return self.frontier.popleft()
+
+
+class TreeCache():
+    """
+    Least recently used cache of search trees keyed by source state,
+    bounded by the no. of trees and the total no. of nodes they hold.
+    """
+
+    def __init__(self, max_trees=16, max_nodes=None):
+        self.max_trees = max_trees
+        self.max_nodes = max_nodes
+        self.trees = OrderedDict()  # least recently used first
+        self.nodes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source):
+        tree = self.trees.get(source)
+        if tree is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.trees.move_to_end(source)
+        return tree
+
+    def clear(self):
+        self.trees.clear()
+        self.nodes = 0
+
+    def put(self, source, tree):
+        if source in self.trees:
+            self.nodes -= len(self.trees.pop(source))
+
+        # a tree larger than the whole budget is never kept
+        if self.max_nodes is not None and len(tree) > self.max_nodes:
+            return
+        self.trees[source] = tree
+        self.nodes += len(tree)
+
+        while len(self.trees) > self.max_trees or (
+            self.max_nodes is not None and self.nodes > self.max_nodes
+        ):
+            _, evicted = self.trees.popitem(last=False)
+            self.nodes -= len(evicted)
+            self.evictions += 1
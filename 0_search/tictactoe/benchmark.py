@@ -0,0 +1,77 @@
+"""
+Compares serial and parallel root-split decision times of the mnk
+engine at several board sizes, from the same seeded positions.
+
+Usage: python benchmark.py [--depth N] [--moves N] [--workers N]
+                           [--seed N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import mnk
+
+# (m, n, k) board sizes benchmarked
+SIZES = [(4, 4, 3), (5, 5, 4), (7, 7, 5), (9, 9, 5)]
+
+
+def opening(game, moves, seed):
+    """
+    Returns (x, o) masks after the given no. of random moves
+    near the center, stopping early if the game ends.
+    """
+    rng = random.Random(seed)
+    x = o = 0
+    for _ in range(moves):
+        me, them = (x, o) if game.player(x, o) == mnk.X else (o, x)
+        cell = rng.choice(game.candidates(me, them)[:8])
+        if game.player(x, o) == mnk.X:
+            x |= 1 << cell
+        else:
+            o |= 1 << cell
+        if game.winner(x, o) is not None:
+            break
+    return x, o
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=4,
+                        help="search depth of each decision")
+    parser.add_argument("--moves", type=int, default=4,
+                        help="random opening moves before deciding")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'board':>8} {'serial s':>9} {'parallel s':>11} {'speedup':>8}"
+          f" {'same move':>10}")
+    context = multiprocessing.get_context("fork")
+    for m, n, k in SIZES:
+        x, o = opening(mnk.Game(m, n, k), args.moves, args.seed)
+
+        # fresh engines on both sides so neither reuses a warm table
+        serial = mnk.Game(m, n, k)
+        start = time.perf_counter()
+        serial_cell = serial.best_move(x, o, max_depth=args.depth)
+        serial_time = time.perf_counter() - start
+
+        mnk.engines.clear()
+        parallel = mnk.Game(m, n, k)
+        with context.Pool(args.workers) as pool:
+            start = time.perf_counter()
+            parallel_cell = parallel.parallel_best_move(
+                x, o, pool, max_depth=args.depth
+            )
+            parallel_time = time.perf_counter() - start
+
+        print(f"{f'{m}x{n}k{k}':>8} {serial_time:>9.3f} {parallel_time:>11.3f}"
+              f" {serial_time / parallel_time:>8.2f}"
+              f" {str(serial_cell == parallel_cell):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Bitboard representation of a Tic Tac Toe board: a 9-bit mask of the
+cells taken by X and one of the cells taken by O, where cell (i, j)
+is bit i * 3 + j.
+"""
+
+import os
+
+# Same markers as tictactoe.py
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# Masks of every row, column and diagonal
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Cells in the order they are tried: center, corners, then edges
+MOVE_ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Cell indices (row * 3 + col) of the board seen under each of its
+# 8 rotations and reflections
+SYMMETRIES = [
+    [0, 1, 2, 3, 4, 5, 6, 7, 8],  # identity
+    [6, 3, 0, 7, 4, 1, 8, 5, 2],  # rotate 90
+    [8, 7, 6, 5, 4, 3, 2, 1, 0],  # rotate 180
+    [2, 5, 8, 1, 4, 7, 0, 3, 6],  # rotate 270
+    [2, 1, 0, 5, 4, 3, 8, 7, 6],  # reflect left-right
+    [6, 7, 8, 3, 4, 5, 0, 1, 2],  # reflect top-bottom
+    [0, 3, 6, 1, 4, 7, 2, 5, 8],  # reflect main diagonal
+    [8, 5, 2, 7, 4, 1, 6, 3, 0],  # reflect anti diagonal
+]
+
+# TRANSFORMS[s][mask] is mask under symmetry s, precomputed for all masks
+TRANSFORMS = [
+    [sum(1 << i for i, cell in enumerate(symmetry) if mask >> cell & 1)
+     for mask in range(FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+
+# Maps canonical (x, o) masks to their minimax value
+transposition_table = {}
+
+# The opening book has one byte per board, indexed by reading the cells
+# as a base 3 number (empty 0, X 1, O 2), holding the cell to play
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "book.bin")
+BOOK_SIZE = 3 ** 9
+NO_MOVE = 255
+
+# BASE3[mask] is the base 3 number with a 1 digit for every bit of mask
+BASE3 = [sum(3 ** cell for cell in range(9) if mask >> cell & 1)
+         for mask in range(FULL + 1)]
+
+# Contents of the opening book once loaded, None if not loaded yet
+book = None
+
+# No. of positions visited by the most recent best_move
+counters = {"nodes": 0}
+
+
+def from_board(board):
+    """
+    Returns the (x, o) masks of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * 3 + j)
+            elif cell == O:
+                o |= 1 << (i * 3 + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of (x, o) masks.
+    """
+    return [[X if x >> (i * 3 + j) & 1 else O if o >> (i * 3 + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn, following tictactoe.player:
+    O if an odd no. of cells is empty, X otherwise.
+    """
+    empty = 9 - bin(x | o).count("1")
+    return O if empty % 2 else X
+
+
+def actions(x, o):
+    """
+    Returns the free cells, in MOVE_ORDER.
+    """
+    taken = x | o
+    return [cell for cell in MOVE_ORDER if not taken >> cell & 1]
+
+
+def result(x, o, cell):
+    """
+    Returns the (x, o) masks after the next player takes cell.
+    """
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise NameError("Invalid action!")
+    if player(x, o) == X:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    for line in LINES:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (x | o) == FULL or winner(x, o) is not None
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {None: 0, X: 1, O: -1}[winner(x, o)]
+
+
+def canonical(x, o):
+    """
+    Returns the smallest (x, o) pair over all symmetries of the board.
+    """
+    return min((transform[x], transform[o]) for transform in TRANSFORMS)
+
+
+def value(x, o):
+    """
+    Returns the minimax value of the board, 1 if X wins with perfect
+    play, -1 if O does and 0 for a tie.
+    """
+    counters["nodes"] += 1
+    key = canonical(x, o)
+    if key in transposition_table:
+        return transposition_table[key]
+
+    if terminal(x, o):
+        best = utility(x, o)
+    elif player(x, o) == X:
+        best = max(value(*result(x, o, cell)) for cell in actions(x, o))
+    else:
+        best = min(value(*result(x, o, cell)) for cell in actions(x, o))
+
+    transposition_table[key] = best
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the optimal cell for the current player, the first one in
+    MOVE_ORDER among equally good cells, or None if the game is over.
+    """
+    counters["nodes"] = 0
+    if terminal(x, o):
+        return None
+
+    sign = 1 if player(x, o) == X else -1
+    best_cell, best_value = None, None
+    for cell in actions(x, o):
+        cell_value = sign * value(*result(x, o, cell))
+        if best_value is None or cell_value > best_value:
+            best_cell, best_value = cell, cell_value
+    return best_cell
+
+
+def book_index(x, o):
+    """
+    Returns the position of the board in the opening book.
+    """
+    return BASE3[x] + 2 * BASE3[o]
+
+
+def load_book():
+    """
+    Returns the opening book, or an empty one if it was never built
+    with build_book.py.
+    """
+    global book
+    if book is None:
+        try:
+            with open(BOOK_PATH, "rb") as f:
+                book = f.read()
+        except OSError:
+            book = b""
+        if len(book) != BOOK_SIZE:
+            book = b""
+    return book
+
+
+def book_move(x, o):
+    """
+    Returns the cell the opening book plays on the board,
+    or None if the board is not in the book.
+    """
+    table = load_book()
+    if not table:
+        return None
+    cell = table[book_index(x, o)]
+    return None if cell == NO_MOVE else cell
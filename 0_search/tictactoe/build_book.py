@@ -0,0 +1,46 @@
+"""
+Builds the opening book consulted by tictactoe.minimax: the optimal
+action of every 3x3 position reachable from initial_state().
+
+Usage: python build_book.py
+"""
+
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def reachable(board, positions):
+    """
+    Adds every non-terminal position reachable from board to positions,
+    keyed by their book index.
+    """
+    index = bitboard.book_index(*bitboard.from_board(board))
+    if index in positions or ttt.terminal(board):
+        return
+    positions[index] = board
+    for action in ttt.actions(board):
+        reachable(ttt.result(board, action), positions)
+
+
+def main():
+    start = time.perf_counter()
+    positions = {}
+    reachable(ttt.initial_state(), positions)
+
+    # one byte per possible board, holding the cell to play
+    book = bytearray([bitboard.NO_MOVE]) * bitboard.BOOK_SIZE
+    for index, board in positions.items():
+        x, o = bitboard.from_board(board)
+        book[index] = bitboard.best_move(x, o)
+
+    with open(bitboard.BOOK_PATH, "wb") as f:
+        f.write(book)
+    elapsed = time.perf_counter() - start
+    print(f"Solved {len(positions)} positions in {elapsed:.2f}s, "
+          f"wrote {len(book)} bytes to {bitboard.BOOK_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe and the larger m,n,k
+boards, a drop-in alternative to tictactoe.minimax.
+
+The tree is built with tictactoe's player, actions, result, terminal
+and utility; random playouts run on the mnk engine's bitboards, a whole
+batch at a time with NumPy when it is installed.
+"""
+
+import math
+import random
+import time
+
+import tictactoe as ttt
+
+try:
+    import numpy as np
+except ImportError:  # playouts fall back to one game at a time
+    np = None
+
+# Maps (m, n, k) to the windows and columns used by vector_playouts
+window_arrays = {}
+
+# Counters from the most recent search
+counters = {"iterations": 0, "playouts": 0, "playouts_per_second": 0.0}
+
+
+class Node():
+
+    def __init__(self, board, parent, action, k):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.terminal = ttt.terminal(board, k)
+        self.untried = [] if self.terminal else sorted(ttt.actions(board))
+
+        # player who made action, whose results value adds up
+        self.mover = None if parent is None else ttt.player(parent.board)
+        self.visits = 0
+        self.value = 0.0
+
+    def select(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.value / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)
+        ))
+
+
+def mcts(board, k=3, time_limit=ttt.TIME_LIMIT, iterations=None,
+         exploration=math.sqrt(2), batch=8, seed=None):
+    """
+    Returns the action for the current player chosen by UCT search,
+    running for the given no. of iterations or time_limit seconds.
+
+    Each iteration expands one node and scores it with a batch of
+    random playouts.
+    """
+    rng = random.Random(seed)
+    vector_rng = None if np is None else np.random.default_rng(seed)
+    game = ttt.engine(len(board), len(board[0]), k)
+    root = Node(board, None, None, k)
+    if root.terminal:
+        return None
+
+    counters["iterations"] = counters["playouts"] = 0
+    start = time.perf_counter()
+    deadline = start + time_limit
+    while (counters["iterations"] < iterations if iterations is not None
+           else time.perf_counter() < deadline):
+        counters["iterations"] += 1
+
+        # selection: descend through fully expanded nodes
+        node = root
+        while not node.untried and node.children:
+            node = node.select(exploration)
+
+        # expansion: add one untried action as a new child
+        if node.untried:
+            action = node.untried.pop(rng.randrange(len(node.untried)))
+            child = Node(ttt.result(node.board, action), node, action, k)
+            node.children.append(child)
+            node = child
+
+        # simulation: total score from X's point of view
+        if node.terminal:
+            count = 1
+            score = ttt.utility(node.board, k)
+        else:
+            count = batch
+            x, o = game.from_board(node.board)
+            if vector_rng is not None:
+                score = vector_playouts(game, x, o, count, vector_rng)
+            else:
+                score = sum(playout(game, x, o, rng) for _ in range(count))
+            counters["playouts"] += count
+
+        # backpropagation
+        while node is not None:
+            node.visits += count
+            if node.mover is not None:
+                node.value += score if node.mover == ttt.X else -score
+            node = node.parent
+
+    elapsed = time.perf_counter() - start
+    counters["playouts_per_second"] = (counters["playouts"] / elapsed
+                                       if elapsed else 0.0)
+    # with no iteration run there are no statistics to choose by
+    if not root.children:
+        return rng.choice(root.untried)
+    return max(root.children, key=lambda child: child.visits).action
+
+
+def playout(game, x, o, rng):
+    """
+    Plays random moves from the (x, o) masks to the end of the game and
+    returns 1 if X wins, -1 if O wins and 0 for a tie.
+    """
+    empty = [cell for cell in game.cells if not (x | o) >> cell & 1]
+    rng.shuffle(empty)
+    turn_x = game.player(x, o) == ttt.X
+    for cell in empty:
+        if turn_x:
+            x |= 1 << cell
+            if game.wins(x, cell):
+                return 1
+        else:
+            o |= 1 << cell
+            if game.wins(o, cell):
+                return -1
+        turn_x = not turn_x
+    return 0
+
+
+def vector_playouts(game, x, o, count, rng):
+    """
+    Plays count random games at once from the (x, o) masks and returns
+    their total score, 1 for each X win and -1 for each O win.
+
+    Every game is a random order of the empty cells; a line is won at
+    the time its last stone is placed, so the winner of a game is the
+    player whose earliest completed line comes first.
+    """
+    windows, columns = window_columns(game)
+    empty = [i for i, cell in enumerate(game.cells)
+             if not (x | o) >> cell & 1]
+
+    # times[g, c] is when cell c is played in game g, -1 if already taken
+    order = rng.random((count, len(empty))).argsort(axis=1)
+    times = np.full((count, len(columns)), -1)
+    times[:, empty] = order
+
+    # owners[g, c] is True where X holds cell c in game g
+    moves_x = (times % 2 == 0) == (game.player(x, o) == ttt.X)
+    taken_x = np.array([bool(x >> cell & 1) for cell in columns])
+    owners = np.where(times < 0, taken_x, moves_x)
+
+    # completion time of each window, for the player owning all of it
+    window_times = times[:, windows].max(axis=2)
+    window_owners = owners[:, windows]
+    never = len(columns)
+    first_x = np.where(window_owners.all(axis=2),
+                       window_times, never).min(axis=1)
+    first_o = np.where((~window_owners).all(axis=2),
+                       window_times, never).min(axis=1)
+    return int((first_x < first_o).sum() - (first_o < first_x).sum())
+
+
+def window_columns(game):
+    """
+    Returns (windows, columns): the game's k-cell windows as an array of
+    column indices into columns, the list of board cells.
+    """
+    key = (game.m, game.n, game.k)
+    if key not in window_arrays:
+        columns = game.cells
+        windows = np.array([[i for i, cell in enumerate(columns)
+                             if window >> cell & 1]
+                            for window in game.windows])
+        window_arrays[key] = (windows, columns)
+    return window_arrays[key]
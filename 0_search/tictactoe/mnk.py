@@ -0,0 +1,374 @@
+"""
+Generalized m,n,k-game engine: an m x n board where the first player to
+get k in a row (horizontally, vertically or diagonally) wins, as in Tic
+Tac Toe (3,3,3) or gomoku (15,15,5).
+
+Boards are a pair of Python int bitboards, one for each player. Cell
+(i, j) is bit i * (n + 1) + j; the extra column is always empty, so
+lines running off one row never continue on the next.
+"""
+
+import time
+
+# Same markers as tictactoe.py
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win, above any heuristic evaluation
+WIN = 10 ** 9
+
+# Checking the clock on every node would dominate small searches
+CLOCK_INTERVAL = 1024
+
+# Transposition table entry flags
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+# Engines of this process by (m, n, k), used by pool workers
+engines = {}
+
+
+class Timeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Game():
+
+    def __init__(self, m=3, n=3, k=3):
+        """
+        Create an engine for m rows, n columns and k in a row.
+        """
+        if k > max(m, n):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.width = n + 1
+        self.cells = [i * self.width + j for i in range(m) for j in range(n)]
+        self.full = sum(1 << cell for cell in self.cells)
+
+        # right, down, down-right and down-left
+        self.directions = [1, self.width, self.width + 1, self.width - 1]
+
+        # every group of k cells in a line, for the heuristic; windows
+        # crossing the empty column are not on the board
+        self.windows = []
+        for cell in self.cells:
+            for direction in self.directions:
+                window = [cell + step * direction for step in range(self.k)]
+                mask = sum(1 << c for c in window)
+                if mask & self.full == mask:
+                    self.windows.append(mask)
+
+        # cells nearest the center first
+        def distance(cell):
+            i, j = self.position(cell)
+            di, dj = abs(i - (m - 1) / 2), abs(j - (n - 1) / 2)
+            return max(di, dj), di + dj, cell
+        self.order = sorted(self.cells, key=distance)
+
+        # Maps (mover, opponent) masks to (depth, value, flag, best cell)
+        self.table = {}
+        self.nodes = 0
+        self.deadline = None
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) masks of a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.width + j)
+                elif cell == O:
+                    o |= 1 << (i * self.width + j)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list-of-lists board of (x, o) masks.
+        """
+        return [[X if x >> (i * self.width + j) & 1
+                 else O if o >> (i * self.width + j) & 1
+                 else EMPTY for j in range(self.n)] for i in range(self.m)]
+
+    def position(self, cell):
+        """
+        Returns the (i, j) action of a cell.
+        """
+        return divmod(cell, self.width)
+
+    def player(self, x, o):
+        """
+        Returns player who has the next turn, following tictactoe.player:
+        O if an odd no. of cells is empty, X otherwise.
+        """
+        empty = len(self.cells) - bin(x | o).count("1")
+        return O if empty % 2 else X
+
+    def wins(self, mask, cell):
+        """
+        Returns True if the stones in mask make k in a row through cell,
+        so only lines around the last move are checked.
+        """
+        for direction in self.directions:
+            count = 1
+            for sign in (1, -1):
+                c = cell + sign * direction
+                while c >= 0 and mask >> c & 1:
+                    count += 1
+                    c += sign * direction
+            if count >= self.k:
+                return True
+        return False
+
+    def has_line(self, mask):
+        """
+        Returns True if mask holds k in a row anywhere.
+        """
+        for direction in self.directions:
+            line = mask
+            for step in range(1, self.k):
+                line &= mask >> (step * direction)
+            if line:
+                return True
+        return False
+
+    def winner(self, x, o):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def evaluate(self, me, them):
+        """
+        Returns a heuristic score of the position for the player to move,
+        favouring windows holding many stones of one player only.
+        """
+        score = 0
+        for window in self.windows:
+            mine = window & me
+            theirs = window & them
+            if mine and not theirs:
+                score += 4 ** bin(mine).count("1")
+            elif theirs and not mine:
+                score -= 4 ** bin(theirs).count("1")
+        return score
+
+    def candidates(self, me, them, first=None):
+        """
+        Returns the empty cells worth searching, nearest the center
+        first: cells within two steps of a stone, or the center of an
+        empty board.
+        """
+        taken = me | them
+        if not taken:
+            return self.order[:1]
+
+        near = taken
+        for _ in range(2):
+            grown = near
+            for direction in self.directions:
+                grown |= near << direction | near >> direction
+            near = grown & self.full
+        near &= ~taken
+
+        moves = [cell for cell in self.order if near >> cell & 1]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def negamax(self, me, them, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the player to move, whose
+        stones are me, searching depth more moves with alpha-beta pruning.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and self.deadline is not None:
+            if time.perf_counter() > self.deadline:
+                raise Timeout()
+
+        if (me | them) == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, them)
+
+        key = (me, them)
+        entry = self.table.get(key)
+        best_cell = None
+        if entry is not None:
+            entry_depth, value, flag, best_cell = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best = -WIN * 2
+        for cell in self.candidates(me, them, best_cell):
+            mine = me | 1 << cell
+            if self.wins(mine, cell):
+                value = WIN - ply
+            else:
+                value = -self.negamax(them, mine, depth - 1, -beta, -alpha,
+                                      ply + 1)
+            if value > best:
+                best, best_cell = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, best, flag, best_cell)
+        return best
+
+    def best_move(self, x, o, time_limit=None, max_depth=None):
+        """
+        Returns the best cell for the player to move found by iterative
+        deepening within time_limit seconds, or None if the game is over.
+
+        Each iteration searches one move deeper; when time runs out the
+        best cell of the last finished iteration is used. A search as
+        deep as the no. of empty cells is exact.
+        """
+        self.nodes = 0
+        if self.winner(x, o) is not None or (x | o) == self.full:
+            return None
+
+        me, them = (x, o) if self.player(x, o) == X else (o, x)
+        empty = len(self.cells) - bin(x | o).count("1")
+        limit = empty if max_depth is None else min(max_depth, empty)
+        self.deadline = (None if time_limit is None
+                         else time.perf_counter() + time_limit)
+
+        best_cell = self.candidates(me, them)[0]
+        for depth in range(1, limit + 1):
+            try:
+                value, cell = self.search_root(me, them, depth, best_cell)
+            except Timeout:
+                break
+            best_cell = cell
+            if abs(value) >= WIN - len(self.cells):
+                break  # the game is decided, deeper search changes nothing
+
+        self.deadline = None
+        return best_cell
+
+    def search_root(self, me, them, depth, first):
+        """
+        Returns (value, cell) of the best root move at the given depth,
+        trying first before the other candidates.
+        """
+        alpha, beta = -WIN * 2, WIN * 2
+        best_value, best_cell = None, None
+        for cell in self.candidates(me, them, first):
+            mine = me | 1 << cell
+            if self.wins(mine, cell):
+                value = WIN
+            else:
+                value = -self.negamax(them, mine, depth - 1, -beta, -alpha, 1)
+            if best_value is None or value > best_value:
+                best_value, best_cell = value, cell
+            alpha = max(alpha, value)
+        return best_value, best_cell
+
+    def parallel_best_move(self, x, o, pool, time_limit=None,
+                           max_depth=None):
+        """
+        Returns the best cell like best_move, but scores the root moves
+        of each iteration in parallel on a multiprocessing pool.
+
+        Workers keep their own engines and transposition tables between
+        iterations; their scores are aggregated here. As in a serial
+        search, the first (previously best) move is scored alone so its
+        value can bound the windows of the moves searched in parallel.
+
+        Tasks carry the deadline as wall-clock time, which all processes
+        share, so tasks queued behind others get no extra time.
+        """
+        self.nodes = 0
+        if self.winner(x, o) is not None or (x | o) == self.full:
+            return None
+
+        me, them = (x, o) if self.player(x, o) == X else (o, x)
+        empty = len(self.cells) - bin(x | o).count("1")
+        limit = empty if max_depth is None else min(max_depth, empty)
+        deadline = (None if time_limit is None
+                    else time.time() + time_limit)
+
+        best_cell = self.candidates(me, them)[0]
+        for depth in range(1, limit + 1):
+            if deadline is not None and time.time() >= deadline:
+                break
+            cells = self.candidates(me, them, best_cell)
+            tasks = [[self.m, self.n, self.k, me, them, cell, depth,
+                      -WIN * 2, deadline] for cell in cells]
+
+            scores = [pool.apply(score_root_move, (tasks[0],))]
+            if scores[0][0] is None:
+                break  # ran out of time
+            for task in tasks[1:]:
+                task[7] = scores[0][0]
+            scores += pool.map(score_root_move, tasks[1:])
+            self.nodes += sum(nodes for _, nodes in scores)
+            if any(value is None for value, _ in scores):
+                break
+
+            # the first of equally good cells wins, as in search_root
+            best_value = None
+            for (value, _), cell in zip(scores, cells):
+                if best_value is None or value > best_value:
+                    best_value, best_cell = value, cell
+            if abs(best_value) >= WIN - len(self.cells):
+                break
+
+        return best_cell
+
+
+def score_root_move(task):
+    """
+    Returns (value, nodes) of playing a root cell, searched depth moves
+    deep by this process's engine, with value None if the wall-clock
+    deadline passed.
+
+    Values not above alpha are only upper bounds.
+    """
+    m, n, k, me, them, cell, depth, alpha, deadline = task
+    game = engines.get((m, n, k))
+    if game is None:
+        game = engines[(m, n, k)] = Game(m, n, k)
+
+    mine = me | 1 << cell
+    if game.wins(mine, cell):
+        return WIN, 1
+    if deadline is not None and time.time() >= deadline:
+        return None, 0
+
+    # the engine times itself with perf_counter, which is per process
+    game.nodes = 0
+    game.deadline = (None if deadline is None
+                     else time.perf_counter() + deadline - time.time())
+    try:
+        value = -game.negamax(them, mine, depth - 1, -WIN * 2, -alpha, 1)
+    except Timeout:
+        value = None
+    finally:
+        game.deadline = None
+    return value, game.nodes
@@ -0,0 +1,135 @@
+"""
+Plays Tic Tac Toe games without a display and prints a JSON report of
+the results, per-move decision latency and nodes searched.
+
+Usage: python simulate.py [--games N] [--opponent {ai,random}]
+                          [--size M N K] [--time-limit S] [--seed N]
+                          [--no-book] [--output FILE]
+
+Against a random opponent the AI alternates between playing X and O.
+With perfect play the AI should never lose on 3x3, and AI against AI
+should always tie.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+import bitboard
+import tictactoe as ttt
+
+
+def play(ai_players, m, n, k, time_limit, rng):
+    """
+    Plays one game where the players in ai_players use minimax and the
+    others move at random. Returns (winner, moves), each move a record
+    of the player, action, latency and nodes searched.
+    """
+    board = ttt.initial_state(m, n)
+    moves = []
+    while not ttt.terminal(board, k):
+        current = ttt.player(board)
+        if current in ai_players:
+            start = time.perf_counter()
+            action = ttt.minimax(board, k, time_limit)
+            latency = time.perf_counter() - start
+            nodes = ttt.counters["nodes"]
+        else:
+            action = rng.choice(sorted(ttt.actions(board)))
+            latency = nodes = None
+        moves.append({"player": current, "action": action,
+                      "latency_ms": None if latency is None
+                      else latency * 1000,
+                      "nodes": nodes})
+        board = ttt.result(board, action)
+    return ttt.winner(board, k), moves
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which the given fraction of values lie, or
+    None if there are no values.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def simulate(games, opponent, m, n, k, time_limit, seed):
+    """
+    Returns the report of playing the given no. of games.
+    """
+    rng = random.Random(seed)
+    results = {"X": 0, "O": 0, "tie": 0}
+    ai_losses = 0
+    latencies = []
+    nodes = []
+
+    for game in range(games):
+        if opponent == "ai":
+            ai_players = {ttt.X, ttt.O}
+        else:
+            ai_players = {ttt.X if game % 2 == 0 else ttt.O}
+        winner, moves = play(ai_players, m, n, k, time_limit, rng)
+
+        results[winner or "tie"] += 1
+        if winner is not None and winner not in ai_players:
+            ai_losses += 1
+        for move in moves:
+            if move["latency_ms"] is not None:
+                latencies.append(move["latency_ms"])
+                nodes.append(move["nodes"])
+
+    return {
+        "games": games,
+        "opponent": opponent,
+        "board": {"m": m, "n": n, "k": k},
+        "time_limit": time_limit,
+        "seed": seed,
+        "results": results,
+        "ai_losses": ai_losses,
+        "moves": {
+            "count": len(latencies),
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+            "max_ms": max(latencies, default=None),
+            "mean_nodes": statistics.mean(nodes) if nodes else None,
+            "max_nodes": max(nodes, default=None),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--opponent", choices=["ai", "random"],
+                        default="random")
+    parser.add_argument("--size", type=int, nargs=3, default=[3, 3, 3],
+                        metavar=("M", "N", "K"))
+    parser.add_argument("--time-limit", type=float, default=ttt.TIME_LIMIT,
+                        help="seconds per move on boards other than 3x3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-book", action="store_true",
+                        help="search 3x3 positions instead of using the "
+                             "opening book")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON report to FILE")
+    args = parser.parse_args()
+    if args.no_book:
+        bitboard.book = b""
+
+    report = simulate(args.games, args.opponent, *args.size,
+                      args.time_limit, args.seed)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
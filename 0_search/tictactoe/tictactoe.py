@@ -1,22 +1,52 @@
 """
 Tic Tac Toe Player
+
+Boards default to 3x3 with 3 in a row to win; larger m x n boards with
+k in a row are played through the mnk engine.
 """
 
+import functools
 import math
-import copy
+
+import bitboard
+import mnk
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Order in which alphabeta tries cells: center, corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Maps exact boards to the best action alphabeta found on them
+best_moves = {}
+
+# Maps search depths to the last action that caused a cutoff there
+killer_moves = {}
+
+# No. of positions visited by the most recent search
+counters = {"nodes": 0}
+
+
+# Seconds the mnk engine may think per move on boards other than 3x3
+TIME_LIMIT = 1.0
+
 
-def initial_state():
+def initial_state(m=3, n=3):
     """
-    Returns starting state of the board.
+    Returns starting state of an m x n board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(m)]
+
+
+@functools.lru_cache(maxsize=None)
+def engine(m, n, k):
+    """
+    Returns the mnk engine for a board size, kept for the whole process
+    so its transposition table is reused between moves.
+    """
+    return mnk.Game(m, n, k)
 
 
 def player(board):
@@ -58,8 +88,8 @@ def result(board, action):
     if board[i][j] != EMPTY:
         raise NameError("Invalid action!")
 
-    # deep clone so that the internal states are also copied
-    board_clone = copy.deepcopy(board)
+    # copy each row so that the original board is left unchanged
+    board_clone = [row[:] for row in board]
 
     # make the move returned by the player() to the cloned board
     board_clone[i][j] = player(board)
@@ -67,10 +97,14 @@ def result(board, action):
     return board_clone
 
 
-def winner(board):
+def winner(board, k=3):
     """
     Returns the winner of the game, if there is one.
     """
+    if (len(board), len(board[0]), k) != (3, 3, 3):
+        game = engine(len(board), len(board[0]), k)
+        return game.winner(*game.from_board(board))
+
     col_val = [0, 0, 0]
     getVal = {X: 1, O: -1}
     left_diagonal = 0
@@ -95,11 +129,11 @@ def winner(board):
     return None
 
 
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
+    if winner(board, k) is not None:
         return True
 
     for row in board:
@@ -110,60 +144,137 @@ def terminal(board):
     return True
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    return {None: 0, X: 1, O: -1}[winner(board)]
+    return {None: 0, X: 1, O: -1}[winner(board, k)]
 
 
-def maximize(board):
+def minimax(board, k=3, time_limit=TIME_LIMIT):
     """
-    Maximizes the value of the board, i.e. optimal for X
+    Returns the optimal action for the current player on the board.
+
+    3x3 boards are looked up in the opening book built by build_book.py,
+    falling back to an exact search on the bitboard form of the board,
+    so no boards are copied while searching. Other sizes use the mnk
+    engine's iterative deepening for time_limit seconds, with a
+    heuristic evaluation where the search is cut off.
     """
-    if terminal(board):
-        return utility(board)
+    if (len(board), len(board[0]), k) != (3, 3, 3):
+        game = engine(len(board), len(board[0]), k)
+        cell = game.best_move(*game.from_board(board), time_limit=time_limit)
+        counters["nodes"] = game.nodes
+        return None if cell is None else game.position(cell)
+
+    # positions in the opening book need no search at all
+    x, o = bitboard.from_board(board)
+    cell = bitboard.book_move(x, o)
+    if cell is not None:
+        counters["nodes"] = 0
+        return divmod(cell, 3)
+
+    cell = bitboard.best_move(x, o)
+    counters["nodes"] = bitboard.counters["nodes"]
+    if cell is None:
+        return None
+    return divmod(cell, 3)
+
+
+def ordered_actions(board, depth=None):
+    """
+    Returns the actions available on the board, most promising first:
+    the best action previously found on this board, the killer action
+    of this depth, then center, corners and edges.
+    """
+    available = actions(board)
+    ordered = [action for action in MOVE_ORDER if action in available]
+    if depth is None:
+        return ordered
+
+    for action in (killer_moves.get(depth), best_moves.get(board_key(board))):
+        if action in available:
+            ordered.remove(action)
+            ordered.insert(0, action)
+    return ordered
 
-    max_val = -math.inf
-    for action in actions(board):
-        max_val = max(max_val, minimize(result(board, action)))
-    return max_val
 
+def board_key(board):
+    """
+    Returns a hashable copy of the board.
+    """
+    return tuple(tuple(row) for row in board)
 
-def minimize(board):
+
+def alphabeta(board):
     """
-    Minimizes the value of the board, i.e. optimal for O
+    Returns the optimal action for the current player on the board,
+    using alpha-beta pruning with move ordering.
+
+    Root actions are tried in the same order as minimax, so both
+    return the same action.
     """
+    counters["nodes"] = 0
+    if terminal(board):
+        return None
+
+    maximizing = player(board) == X
+    best_action = None
+    alpha, beta = -math.inf, math.inf
+    for action in ordered_actions(board):
+        child = result(board, action)
+        if maximizing:
+            value = min_value(child, alpha, beta, 1)
+            if value > alpha:
+                alpha, best_action = value, action
+        else:
+            value = max_value(child, alpha, beta, 1)
+            if value < beta:
+                beta, best_action = value, action
+        if alpha >= beta:
+            break
+    return best_action
+
+
+def max_value(board, alpha, beta, depth):
+    """
+    Returns the value of the board for X, or a bound on it
+    outside the (alpha, beta) window.
+    """
+    counters["nodes"] += 1
     if terminal(board):
         return utility(board)
 
-    min_val = math.inf
-    for action in actions(board):
-        min_val = min(min_val, maximize(result(board, action)))
-    return min_val
+    value = -math.inf
+    for action in ordered_actions(board, depth):
+        child_value = min_value(result(board, action), alpha, beta, depth + 1)
+        if child_value > value:
+            value = child_value
+            best_moves[board_key(board)] = action
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            killer_moves[depth] = action
+            break
+    return value
 
 
-def minimax(board):
+def min_value(board, alpha, beta, depth):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the value of the board for O, or a bound on it
+    outside the (alpha, beta) window.
     """
-    if board == initial_state():
-        return (1, 1)
-
-    current_player = player(board)
-    do_action = EMPTY
-    if current_player == X:
-        X_value = -math.inf
-        for action in actions(board):
-            O_optimal = minimize(result(board, action))
-            if X_value < O_optimal:
-                X_value = O_optimal
-                do_action = action
-    elif current_player == O:
-        O_value = math.inf
-        for action in actions(board):
-            X_optimal = maximize(result(board, action))
-            if O_value > X_optimal:
-                O_value = X_optimal
-                do_action = action
-    return do_action
+    counters["nodes"] += 1
+    if terminal(board):
+        return utility(board)
+
+    value = math.inf
+    for action in ordered_actions(board, depth):
+        child_value = max_value(result(board, action), alpha, beta, depth + 1)
+        if child_value < value:
+            value = child_value
+            best_moves[board_key(board)] = action
+        beta = min(beta, value)
+        if alpha >= beta:
+            killer_moves[depth] = action
+            break
+    return value
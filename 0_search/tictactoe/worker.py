@@ -0,0 +1,59 @@
+"""
+Runs an AI player's search in a background process, so that runner.py
+can keep drawing frames while the computer thinks and can cancel a
+search that is no longer needed.
+"""
+
+import multiprocessing
+import queue
+
+import mcts
+import tictactoe as ttt
+
+# AI players by name, as chosen on the runner's command line
+players = {"minimax": ttt.minimax, "mcts": mcts.mcts}
+
+
+def run(player, board, results):
+    """
+    Searches board with the named player and puts (action, stats) on the
+    results queue, stats being the playouts/second of an MCTS search.
+    """
+    action = players[player](board)
+    stats = mcts.counters["playouts_per_second"] if player == "mcts" else None
+    results.put((action, stats))
+
+
+class Search():
+
+    def __init__(self, player, board):
+        """
+        Start searching board with the named player in a new process.
+        """
+        self.results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=run, args=(player, board, self.results), daemon=True
+        )
+        self.process.start()
+
+    def poll(self):
+        """
+        Returns (action, stats) once the search has finished, None while
+        it is still running.
+        """
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            if not self.process.is_alive() and self.process.exitcode:
+                raise RuntimeError("search process failed")
+            return None
+        self.process.join()
+        return result
+
+    def cancel(self):
+        """
+        Stops the search, discarding its result.
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
@@ -1,7 +1,46 @@
 import itertools
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # the numpy engine falls back to compiled sentences
+    np = None
+
+# Models checked at once by the numpy engine, bounding its memory use
+CHUNK_SIZE = 2 ** 16
+
+# Live sentences by structure, so equal sentences are a single object
+sentences = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    @classmethod
+    def make(cls, key, symbols, **fields):
+        """
+        Returns the sentence with the given structure key, creating it
+        only if no equal sentence exists yet. Sentences are immutable, so
+        they compare by identity and cache their hash and symbols.
+        """
+        sentence = sentences.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            object.__setattr__(sentence, "_symbols", frozenset(symbols))
+            sentences[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("logical sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +52,30 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self._symbols)
+
+    def function(self, index):
+        """
+        Returns a function evaluating the logical sentence on an int
+        model, whose bit index[name] is the value of symbol name.
+        """
+        raise Exception("nothing to compile")
+
+    def evaluate_array(self, columns):
+        """
+        Evaluates the logical sentence on many models at once, columns
+        mapping each symbol name to a NumPy bool array of its values.
+        """
+        raise Exception("nothing to evaluate")
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the logical sentence on an int
+        model, whose bit i is the value of symbols[i].
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        function = self.function(index)
+        return lambda model: bool(function(model))
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +105,13 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        return cls.make(("symbol", cls, name), {name}, name=name)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __reduce__(self):
+        return (type(self), (self.name,))
 
     def __repr__(self):
         return self.name
@@ -65,20 +125,34 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def function(self, index):
+        bit = self.function_bit(index)
+        return lambda model: model >> bit & 1
+
+    def function_bit(self, index):
+        """Returns the bit of the symbol in a compiled model."""
+        try:
+            return index[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def evaluate_array(self, columns):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.make(("not", cls, operand), operand._symbols,
+                        operand=operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def __reduce__(self):
+        return (type(self), (self.operand,))
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,24 +163,29 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def function(self, index):
+        operand = self.operand.function(index)
+        return lambda model: not operand(model)
+
+    def evaluate_array(self, columns):
+        return ~self.operand.evaluate_array(columns)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+        return cls.make(
+            ("and", cls, conjuncts),
+            frozenset().union(*[conjunct._symbols for conjunct in conjuncts]),
+            conjuncts=conjuncts
         )
 
+    def __reduce__(self):
+        return (type(self), self.conjuncts)
+
     def __repr__(self):
         conjunctions = ", ".join(
             [str(conjunct) for conjunct in self.conjuncts]
@@ -114,8 +193,13 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        """
+        Raises TypeError: sentences are immutable, so a conjunction can't
+        grow in place. Build And(*knowledge.conjuncts, conjunct) instead,
+        or add to a KnowledgeBase.
+        """
+        raise TypeError("sentences are immutable; use "
+                        "And(*kb.conjuncts, x) or KnowledgeBase.add")
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,24 +210,40 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def function(self, index):
+        positive, negative, rest = literal_masks(self.conjuncts, index)
+        functions = [conjunct.function(index) for conjunct in rest]
+        if positive or negative:
+            functions.insert(0, lambda model: (
+                (model & positive) == positive and not model & negative
+            ))
+        if not functions:
+            return lambda model: True
+        return conjunction(functions)
+
+    def evaluate_array(self, columns):
+        if not self.conjuncts:
+            return np.ones(column_size(columns), dtype=bool)
+        return np.logical_and.reduce(
+            [conjunct.evaluate_array(columns) for conjunct in self.conjuncts]
+        )
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+        return cls.make(
+            ("or", cls, disjuncts),
+            frozenset().union(*[disjunct._symbols for disjunct in disjuncts]),
+            disjuncts=disjuncts
         )
 
+    def __reduce__(self):
+        return (type(self), self.disjuncts)
+
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
@@ -157,24 +257,37 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def function(self, index):
+        positive, negative, rest = literal_masks(self.disjuncts, index)
+        functions = [disjunct.function(index) for disjunct in rest]
+        if positive or negative:
+            functions.insert(0, lambda model: (
+                model & positive or ~model & negative
+            ))
+        if not functions:
+            return lambda model: False
+        return disjunction(functions)
+
+    def evaluate_array(self, columns):
+        if not self.disjuncts:
+            return np.zeros(column_size(columns), dtype=bool)
+        return np.logical_or.reduce(
+            [disjunct.evaluate_array(columns) for disjunct in self.disjuncts]
+        )
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return cls.make(("implies", cls, antecedent, consequent),
+                        antecedent._symbols | consequent._symbols,
+                        antecedent=antecedent, consequent=consequent)
 
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def __reduce__(self):
+        return (type(self), (self.antecedent, self.consequent))
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,24 +301,41 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def function(self, index):
+        antecedent = literal(self.antecedent, index)
+        consequent = literal(self.consequent, index)
+        if antecedent is not None and consequent is not None:
+            # a clause of two literals: the antecedent's is negated
+            positive = negative = 0
+            for (bit, sign) in ((antecedent[0], not antecedent[1]),
+                                consequent):
+                if sign:
+                    positive |= 1 << bit
+                else:
+                    negative |= 1 << bit
+            return lambda model: model & positive or ~model & negative
+
+        antecedent = self.antecedent.function(index)
+        consequent = self.consequent.function(index)
+        return lambda model: not antecedent(model) or consequent(model)
+
+    def evaluate_array(self, columns):
+        return (~self.antecedent.evaluate_array(columns)
+                | self.consequent.evaluate_array(columns))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.make(("biconditional", cls, left, right),
+                        left._symbols | right._symbols,
+                        left=left, right=right)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,12 +351,180 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
+    def function(self, index):
+        left = self.left.function(index)
+        right = self.right.function(index)
+        return lambda model: (not left(model)) == (not right(model))
+
+    def evaluate_array(self, columns):
+        return (self.left.evaluate_array(columns)
+                == self.right.evaluate_array(columns))
+
+
+def column_size(columns):
+    """
+    Returns the no. of models in columns: the length of any column, or 1
+    (the single model) if there are no symbols.
+    """
+    for column in columns.values():
+        return len(column)
+    return 1
+
+
+def literal(sentence, index):
+    """
+    Returns (bit, sign) if sentence is a symbol (sign True) or a negated
+    symbol (sign False) with the given model bit, None otherwise.
+    """
+    if isinstance(sentence, Symbol):
+        return sentence.function_bit(index), True
+    if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+        return sentence.operand.function_bit(index), False
+    return None
+
+
+def literal_masks(sentences, index):
+    """
+    Returns (positive, negative, rest): masks of the model bits of the
+    symbols and of the negated symbols among sentences, and the list of
+    the other sentences, so literals can be tested all at once.
+    """
+    positive = negative = 0
+    rest = []
+    for sentence in sentences:
+        found = literal(sentence, index)
+        if found is None:
+            rest.append(sentence)
+        elif found[1]:
+            positive |= 1 << found[0]
+        else:
+            negative |= 1 << found[0]
+    return positive, negative, rest
+
+
+def conjunction(functions):
+    """
+    Returns a function true on models where all of functions are,
+    combining them pairwise so calls nest only logarithmically deep.
+    """
+    if len(functions) == 1:
+        return functions[0]
+    first = conjunction(functions[:len(functions) // 2])
+    second = conjunction(functions[len(functions) // 2:])
+    return lambda model: first(model) and second(model)
+
+
+def disjunction(functions):
+    """
+    Returns a function true on models where any of functions is,
+    combining them pairwise so calls nest only logarithmically deep.
+    """
+    if len(functions) == 1:
+        return functions[0]
+    first = disjunction(functions[:len(functions) // 2])
+    second = disjunction(functions[len(functions) // 2:])
+    return lambda model: first(model) or second(model)
+
+
+class KnowledgeBase():
+
+    def __init__(self, *sentences):
+        """
+        Creates a knowledge base of the given sentences, kept as clauses
+        of one SAT solver from sat.py that every query reuses.
+        """
+        import sat
+        self.encoder = sat.Encoder()
+        self.solver = sat.Solver()
+        self.sentences = []
+        for sentence in sentences:
+            self.add(sentence)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def __repr__(self):
+        return f"KnowledgeBase({self.sentence()})"
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        literal = self.encoder.literal(sentence)
+        self.flush()
+        self.solver.add_clause([literal])
+
+    def sentence(self):
+        """Returns the conjunction of all sentences in the knowledge base."""
+        return And(*self.sentences)
+
+    def flush(self):
+        """Passes clauses new to the encoder on to the solver."""
+        for clause in self.encoder.clauses:
+            self.solver.add_clause(clause)
+        self.encoder.clauses = []
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        return query in self.entailed([query])
+
+    def entailed(self, queries):
+        """
+        Returns the queries entailed by the knowledge base, in order.
+
+        A query is entailed if the knowledge base is unsatisfiable when
+        the query is assumed false. Each satisfying model found along the
+        way also rules out every other query it makes false.
+        """
+        literals = [self.encoder.literal(query) for query in queries]
+        self.flush()
+        if not self.solver.solve():
+            return list(queries)
+
+        # queries true in every model found so far
+        candidates = set(literals)
+        pending = list(dict.fromkeys(literals))
+        while pending:
+            model = self.solver.model()
+            candidates = {literal for literal in candidates
+                          if model.get(abs(literal)) == (literal > 0)}
+            pending = [literal for literal in pending if literal in candidates]
+            while pending and not self.solver.solve([-pending[0]]):
+                pending.pop(0)
+        return [query for query, literal in zip(queries, literals)
+                if literal in candidates]
+
+
+def model_check(knowledge, query, engine="enumerate"):
+    """
+    Checks if knowledge base entails query, with the given engine:
+    "enumerate" checks every model, "compiled" checks every model with
+    compiled sentences, "numpy" checks blocks of models as NumPy arrays
+    and "sat" runs the SAT solver in sat.py.
+    """
+    if engine == "sat":
+        import sat
+        return sat.entails(knowledge, query)
+    if engine == "numpy" and np is not None:
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        total = 2 ** len(symbols)
+        for start in range(0, total, CHUNK_SIZE):
+            # bit i of each model no. is the value of symbols[i]
+            models = np.arange(start, min(start + CHUNK_SIZE, total),
+                               dtype=np.uint64)
+            columns = {symbol: (models >> np.uint64(i) & np.uint64(1)) == 1
+                       for i, symbol in enumerate(symbols)}
+            if np.any(knowledge.evaluate_array(columns)
+                      & ~query.evaluate_array(columns)):
+                return False
+        return True
+    if engine == "numpy":
+        engine = "compiled"
+    if engine == "compiled":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        knowledge = knowledge.compile(symbols)
+        query = query.compile(symbols)
+        return all(query(model) for model in range(2 ** len(symbols))
+                   if knowledge(model))
+    if engine != "enumerate":
+        raise ValueError(f"unknown engine {engine}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
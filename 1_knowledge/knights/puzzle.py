@@ -1,3 +1,5 @@
+import sys
+
 from logic import *
 
 AKnight = Symbol("A is a Knight")
@@ -76,6 +78,10 @@ knowledge3 = And(
 
 
 def main():
+    # python puzzle.py [enumerate|compiled|numpy|sat] checks each symbol
+    # with that model_check engine; by default one KnowledgeBase per
+    # puzzle answers all of them
+    engine = sys.argv[1] if len(sys.argv) > 1 else None
     symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
     puzzles = [
         ("Puzzle 0", knowledge0),
@@ -87,9 +93,12 @@ def main():
         print(puzzle)
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
+        elif engine is None:
+            for symbol in KnowledgeBase(knowledge).entailed(symbols):
+                print(f"    {symbol}")
         else:
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if model_check(knowledge, symbol, engine):
                     print(f"    {symbol}")
 
 
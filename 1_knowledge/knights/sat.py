@@ -0,0 +1,323 @@
+"""
+SAT backend for logic.model_check.
+
+Sentences are compiled to conjunctive normal form with the Tseitin
+encoding: every compound subformula gets a new variable constrained to
+equal its value, so the CNF grows linearly with the sentence. Clauses
+are lists of DIMACS-style literals, a positive or negative variable no.
+
+The solver is conflict-driven clause learning (CDCL): unit propagation
+over two watched literals per clause, first-UIP conflict analysis with
+non-chronological backjumping, and activity-based branching. Knowledge
+entails a query exactly when knowledge and the query's negation are
+unsatisfiable together.
+"""
+
+import logic
+
+
+class Encoder():
+
+    def __init__(self):
+        """Creates an encoder with no variables or clauses."""
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+
+    def new_variable(self):
+        """Returns a new variable no."""
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        """Returns the variable no. of a symbol name."""
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equal to the sentence, adding its clauses."""
+        if isinstance(sentence, logic.Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, logic.Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, logic.And):
+            parts = [self.literal(c) for c in sentence.conjuncts]
+            v = self.new_variable()
+            # v => each part, all parts => v
+            for part in parts:
+                self.clauses.append([-v, part])
+            self.clauses.append([v] + [-part for part in parts])
+        elif isinstance(sentence, logic.Or):
+            parts = [self.literal(d) for d in sentence.disjuncts]
+            v = self.new_variable()
+            # each part => v, v => some part
+            for part in parts:
+                self.clauses.append([v, -part])
+            self.clauses.append([-v] + parts)
+        elif isinstance(sentence, logic.Implication):
+            a = self.literal(sentence.antecedent)
+            c = self.literal(sentence.consequent)
+            v = self.new_variable()
+            self.clauses += [[-v, -a, c], [v, a], [v, -c]]
+        elif isinstance(sentence, logic.Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.new_variable()
+            self.clauses += [[-v, -a, b], [-v, a, -b],
+                             [v, a, b], [v, -a, -b]]
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = v
+        return v
+
+
+def to_cnf(sentence):
+    """
+    Returns (clauses, variables) of the Tseitin encoding of sentence:
+    clauses satisfiable exactly when sentence is, and the variable no.
+    of each symbol name.
+    """
+    encoder = Encoder()
+    encoder.clauses.append([encoder.literal(sentence)])
+    return encoder.clauses, encoder.variables
+
+
+class Solver():
+
+    def __init__(self):
+        """Creates a solver with no clauses."""
+        self.clauses = []
+        self.watches = {}
+        self.values = {}
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.unsatisfiable = False
+
+    def ensure(self, variable):
+        """Makes room for variables up to the given no."""
+        while len(self.level) <= variable:
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+
+    def value(self, literal):
+        """Returns True or False if literal is assigned, None otherwise."""
+        return self.values.get(literal)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current level."""
+        variable = abs(literal)
+        self.values[literal] = True
+        self.values[-literal] = False
+        self.level[variable] = len(self.limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def backtrack(self, level):
+        """Undoes every assignment above the given decision level."""
+        if len(self.limits) <= level:
+            return
+        limit = self.limits[level]
+        for literal in self.trail[limit:]:
+            del self.values[literal]
+            del self.values[-literal]
+        del self.trail[limit:]
+        del self.limits[level:]
+        self.head = limit
+
+    def add_clause(self, clause):
+        """Adds a clause of literals, simplified by level 0 assignments."""
+        self.backtrack(0)
+        if self.unsatisfiable:
+            return
+        clause = list(dict.fromkeys(clause))
+        for literal in clause:
+            self.ensure(abs(literal))
+        if any(-literal in clause or self.value(literal) is True
+               for literal in clause):
+            return
+        clause = [literal for literal in clause
+                  if self.value(literal) is None]
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        """Stores a clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def propagate(self):
+        """
+        Assigns the literals implied by unit clauses, returning the index
+        of a conflicting clause, or None if there is no conflict.
+        """
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches.get(false, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = self.clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if self.value(clause[0]) is True:
+                    kept.append(index)
+                    continue
+
+                # look for a replacement watch
+                for i in range(2, len(clause)):
+                    if self.value(clause[i]) is not False:
+                        clause[1], clause[i] = clause[i], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(clause[0]) is False:
+                        kept += watching[position + 1:]
+                        self.watches[false] = kept
+                        return index
+                    self.assign(clause[0], index)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): the first-UIP clause learned from the
+        conflicting clause, its asserting literal first, and the level
+        to backjump to.
+        """
+        current = len(self.limits)
+        learned = []
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.level[variable] == current:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # the most recent assignment involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        if not learned:
+            return [-literal], 0
+        # watch the literal of the highest remaining level second
+        highest = max(range(len(learned)),
+                      key=lambda i: self.level[abs(learned[i])])
+        learned[0], learned[highest] = learned[highest], learned[0]
+        return [-literal] + learned, self.level[abs(learned[0])]
+
+    def bump(self, variable):
+        """Raises a variable's branching activity."""
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+
+    def decide(self):
+        """Returns the unassigned variable of highest activity, or None."""
+        best = None
+        for variable in range(1, len(self.level)):
+            if variable not in self.values and (
+                best is None or self.activity[variable] > self.activity[best]
+            ):
+                best = variable
+        return best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        assumptions true, False otherwise. Clauses learned along the way
+        hold without the assumptions, so later calls reuse them.
+        """
+        self.backtrack(0)
+        if self.unsatisfiable:
+            return False
+        for literal in assumptions:
+            self.ensure(abs(literal))
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                self.increment *= 1.05
+                continue
+
+            # assumptions are the first decisions, one level each
+            if len(self.limits) < len(assumptions):
+                literal = assumptions[len(self.limits)]
+                if self.value(literal) is False:
+                    return False
+                self.limits.append(len(self.trail))
+                if self.value(literal) is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(-variable, None)
+
+    def model(self):
+        """Returns the truth value of each variable after a True solve."""
+        return {abs(literal): literal > 0 for literal in self.trail}
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query."""
+    encoder = Encoder()
+    knowledge_literal = encoder.literal(knowledge)
+    query_literal = encoder.literal(query)
+
+    solver = Solver()
+    for clause in encoder.clauses:
+        solver.add_clause(clause)
+    solver.add_clause([knowledge_literal])
+    return not solver.solve([-query_literal])